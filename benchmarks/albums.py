@@ -0,0 +1,93 @@
+"""Сравнение доставки альбома: прежний путь против `utils.functions.send_album`.
+
+Запуск: `python -m benchmarks.albums [каналов] [медиа в альбоме] [задержка API, мс]`.
+Bot API заменён заглушкой с фиксированной задержкой, считаются запросы и общее время.
+"""
+
+import asyncio
+import sys
+from collections import Counter
+from time import perf_counter
+from types import SimpleNamespace
+
+from telegram import InputMediaPhoto
+from telegram.constants import ParseMode
+
+from utils.functions import send_album
+
+
+class FakeBot:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = Counter()
+
+    async def call(self, method: str):
+        self.calls[method] += 1
+        await asyncio.sleep(self.latency)
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        await self.call('send_media_group')
+        return [FakeMessage(self, chat_id) for _ in media]
+
+    async def get_chat(self, chat_id):
+        await self.call('get_chat')
+        return SimpleNamespace(title='Channel', invite_link='https://t.me/+invite')
+
+
+class FakeMessage:
+    def __init__(self, bot: FakeBot, chat_id: int):
+        self.bot = bot
+        self.link = f'https://t.me/c/{chat_id}/1'
+
+    async def edit_caption(self, caption, parse_mode=None):
+        await self.bot.call('edit_message_caption')
+        return self
+
+
+async def legacy_delivery(bot: FakeBot, channels: list[int], medias: list, caption: str):
+    """Путь до рефакторинга: альбом, затем get_chat и edit_caption для каждого канала."""
+    for channel_id in channels:
+        final_media_group = []
+
+        for media in medias:
+            if str(media.media) not in [str(media.media) for media in final_media_group]:
+                final_media_group.append(media)
+
+        sent_messages = await bot.send_media_group(chat_id=channel_id, media=final_media_group)
+
+        channel = await bot.get_chat(channel_id)
+        link = f'https://t.me/{channel.invite_link.split('/')[-1]}'
+        footer = f'\n\nПодписывайтесь на канал - [{channel.title}]({link})'
+
+        await sent_messages[0].edit_caption(caption + footer, parse_mode=ParseMode.MARKDOWN)
+
+
+async def current_delivery(bot: FakeBot, channels: list[int], medias: list, caption: str):
+    medias = list({str(media.media): media for media in medias}.values())
+
+    for channel_id in channels:
+        footer = '\n\nПодписывайтесь на канал - [Channel](https://t.me/+invite)'
+        await send_album(bot, channel_id, medias, caption + footer, 1, [])  # type: ignore
+
+
+async def main(channels_count: int, album_size: int, latency: float):
+    channels = [-1000000000000 - i for i in range(channels_count)]
+    # Как в user_data: медиа первого сообщения альбома повторены для каждого канала
+    medias = [InputMediaPhoto(media='file_0')] * channels_count + [
+        InputMediaPhoto(media=f'file_{i}') for i in range(1, album_size)
+    ]
+
+    for name, delivery in (('legacy', legacy_delivery), ('send_album', current_delivery)):
+        bot = FakeBot(latency)
+        started = perf_counter()
+        await delivery(bot, channels, medias, 'Подпись')
+        elapsed = perf_counter() - started
+
+        print(f'{name:<12} {elapsed:7.3f}s  requests {sum(bot.calls.values()):5}  {dict(bot.calls)}')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    channels_count, album_size, latency_ms = args + [200, 5, 20][len(args) :]
+
+    asyncio.run(main(channels_count, album_size, latency_ms / 1000))
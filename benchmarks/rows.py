@@ -0,0 +1,75 @@
+"""Сравнение способов превращать строки из БД в объекты.
+
+Запуск: `python -m benchmarks.rows [N]`. Выбирает N (по умолчанию 100 000) сгенерированных строк
+каналов и замеряет время выборки с pydantic `model_validate`, `model_construct` и фабрикой строк
+`row_type(ChannelRow)`, которую используют функции `database`.
+"""
+
+import sys
+from collections.abc import Callable
+from time import perf_counter
+
+from psycopg import connect
+from pydantic import BaseModel
+
+from database import dsn, row_type
+from database.schemas import ChannelRow
+
+QUERY = """
+    SELECT i, 1 + i %% 1000, -1000000000000 - i, 'Channel ' || i, 'https://t.me/channel_' || i
+    FROM generate_series(1, %s) i
+"""
+
+
+class ChannelModel(BaseModel):
+    id: int | None = None
+    user_id: int
+    channel_id: int
+    channel_name: str
+    channel_link: str
+
+
+def validate(rows: list[tuple]) -> list:
+    return [
+        ChannelModel.model_validate(
+            {
+                'id': row[0],
+                'user_id': row[1],
+                'channel_id': row[2],
+                'channel_name': row[3],
+                'channel_link': row[4],
+            }
+        )
+        for row in rows
+    ]
+
+
+def construct(rows: list[tuple]) -> list:
+    return [ChannelModel.model_construct(**dict(zip(ChannelRow._fields, row, strict=True))) for row in rows]
+
+
+def measure(name: str, count: int, row_factory=None, build: Callable[[list], list] | None = None):
+    with connect(dsn) as connection:
+        started = perf_counter()
+
+        with connection.cursor(row_factory=row_factory) if row_factory else connection.cursor() as cur:
+            cur.execute(QUERY, (count,))  # type: ignore
+            rows = cur.fetchall()
+
+        fetched = perf_counter()
+        result = build(rows) if build else rows
+        finished = perf_counter()
+
+    assert len(result) == count
+    print(
+        f'{name:<16} fetch {fetched - started:7.3f}s  build {finished - fetched:7.3f}s  '
+        f'total {finished - started:7.3f}s'
+    )
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    measure('model_validate', count, build=validate)
+    measure('model_construct', count, build=construct)
+    measure('row_type', count, row_factory=row_type(ChannelRow))
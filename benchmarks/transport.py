@@ -0,0 +1,100 @@
+"""Пропускная способность рассылки при разных настройках HTTP-клиента Bot API.
+
+Запуск: `python -m benchmarks.transport [сообщений] [задержка ответа, мс]`. Поднимает локальный
+фейковый Bot API, который отвечает на любой метод с заданной задержкой, и отправляет сообщения
+в каналы параллельно, как рассылка через пул ботов. Лимиты Telegram не применяются: замеряется
+только транспорт. HTTP/2 через h2c httpx не поддерживает, поэтому здесь сравнивается HTTP/1.1.
+"""
+
+import asyncio
+import json
+import sys
+from time import perf_counter
+from unittest.mock import patch
+
+from telegram import Bot
+
+from config.environment import settings
+from utils.request import build_request
+
+TOKEN = '123456:fake'
+MESSAGE = {'message_id': 1, 'date': 0, 'chat': {'id': -1001, 'type': 'channel'}}
+
+
+async def fake_bot_api(latency: float):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                path = head.split(b' ', 2)[1].decode()
+                length = 0
+
+                for line in head.decode().split('\r\n'):
+                    if line.lower().startswith('content-length:'):
+                        length = int(line.split(':', 1)[1])
+
+                await reader.readexactly(length)
+                await asyncio.sleep(latency)
+
+                method = path.rsplit('/', 1)[-1]
+                result = {'id': 123456, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}
+                body = json.dumps(
+                    {'ok': True, 'result': result if method == 'getMe' else MESSAGE}
+                ).encode()
+
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    + f'Content-Length: {len(body)}\r\n\r\n'.encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+async def measure(name: str, port: int, messages: int, **overrides):
+    with patch.multiple(settings, **overrides):
+        request = build_request()
+
+    bot = Bot(TOKEN, base_url=f'http://127.0.0.1:{port}/bot', request=request)
+    await bot.initialize()
+
+    started = perf_counter()
+    results = await asyncio.gather(
+        *(bot.send_message(-1001 - i, 'Тест') for i in range(messages)), return_exceptions=True
+    )
+    elapsed = perf_counter() - started
+    errors = sum(1 for result in results if isinstance(result, Exception))
+
+    await bot.shutdown()
+    print(f'{name:<28} {messages / elapsed:8.0f} msg/s  {elapsed:6.2f}s  errors {errors}')
+
+
+async def main(messages: int, latency: float):
+    server = await fake_bot_api(latency)
+    port = server.sockets[0].getsockname()[1]
+
+    async with server:
+        await measure('pool 1 (default)', port, messages, HTTP_POOL_SIZE=1, HTTP_POOL_TIMEOUT=None)
+        await measure('pool 16', port, messages, HTTP_POOL_SIZE=16, HTTP_POOL_TIMEOUT=None)
+        await measure('pool 256', port, messages, HTTP_POOL_SIZE=256, HTTP_POOL_TIMEOUT=None)
+        await measure(
+            'pool 256, no keep-alive',
+            port,
+            messages,
+            HTTP_POOL_SIZE=256,
+            HTTP_POOL_TIMEOUT=None,
+            HTTP_KEEPALIVE_EXPIRY=0,
+        )
+        await measure('pool 16, pool timeout 1s', port, messages, HTTP_POOL_SIZE=16)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    messages, latency_ms = args + [300, 50][len(args) :]
+
+    asyncio.run(main(messages, latency_ms / 1000))
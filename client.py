@@ -2,20 +2,34 @@ from logging import getLogger
 
 from telegram import BotCommand, Update
 from telegram.ext import (
-    AIORateLimiter,
     ApplicationBuilder,
     CallbackQueryHandler,
     ContextTypes,
+    InlineQueryHandler,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
-from commands import button_callbacks, commands, message_handlers
+from commands import button_callbacks, chat_handlers, commands, inline_queries, message_handlers
 from config.environment import settings
 from config.log import configure_logging
+from config.metrics import start_metrics_server, track_handler
+from database.migrations import migrate
+from database.profiling import install_query_profiling
+from utils.bot_pool import bot_pool
+from utils.jobs import register_jobs
+from utils.rate_limiter import PriorityRateLimiter
+from utils.request import build_request
+from utils.tasks import task_supervisor
+from utils.user_data import touch_user_data
 
 logger = getLogger(__name__)
 
+tracked_button_callbacks = [track_handler(callback) for callback in button_callbacks]
+tracked_message_handlers = [track_handler(handler) for handler in message_handlers]
+tracked_inline_queries = [track_handler(handler) for handler in inline_queries]
+
 
 async def set_commands(app):
     commands_list: list[BotCommand] = []
@@ -27,35 +41,73 @@ async def set_commands(app):
     await app.bot.set_my_commands(commands_list)
 
 
+async def post_init(app):
+    await bot_pool.initialize()
+    await set_commands(app)
+
+
+async def post_stop(app):
+    await task_supervisor.drain()
+
+
+async def post_shutdown(app):
+    await bot_pool.shutdown()
+
+
 async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    for callback in button_callbacks:
+    for callback in tracked_button_callbacks:
         await callback(update, context)
 
 
 async def messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    for handler in message_handlers:
+    for handler in tracked_message_handlers:
+        await handler(update, context)
+
+
+async def inline(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    for handler in tracked_inline_queries:
         await handler(update, context)
 
 
 def main():
     configure_logging()
+    start_metrics_server()
+    install_query_profiling()
+
+    if settings.DB_MIGRATE_ON_STARTUP:
+        migrate()
 
     app = ApplicationBuilder().token(settings.TOKEN)
-    app = app.rate_limiter(AIORateLimiter())
+    app = app.rate_limiter(PriorityRateLimiter())
+    app = app.request(build_request())
+    app = app.get_updates_request(build_request(settings.HTTP_UPDATES_POOL_SIZE))
     app = app.build()
 
     commands_list: list[BotCommand] = []
 
     for command_data, handler in commands:
+        handler.callback = track_handler(handler.callback)
         app.add_handler(handler)
         commands_list.append(command_data)
 
+    register_jobs(app)
+
+    # Отдельная группа, чтобы отметка активности не мешала обработчикам из группы 0
+    app.add_handler(TypeHandler(Update, touch_user_data), group=-1)
+
+    for handler in chat_handlers:
+        handler.callback = track_handler(handler.callback)
+        app.add_handler(handler)
+
     app.add_handler(CallbackQueryHandler(callbacks))
+    app.add_handler(InlineQueryHandler(inline))
     app.add_handler(
         MessageHandler(filters.ALL & ~filters.COMMAND, messages),
     )
 
-    app.post_init = set_commands
+    app.post_init = post_init
+    app.post_stop = post_stop
+    app.post_shutdown = post_shutdown
 
     app.run_polling()
 
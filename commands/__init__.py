@@ -1,12 +1,26 @@
+from .broadcasts import button_callback as broadcasts_button_callback
+from .broadcasts import delete_command as delete_post
+from .broadcasts import edit_command as edit_post
+from .channel_import import button_callbacks as channel_import_button_callbacks
+from .channel_import import message_handlers as channel_import_message_handlers
+from .channel_sync import handlers as channel_sync_handlers
+from .channel_search import button_callbacks as channel_search_button_callbacks
+from .channel_search import message_handlers as channel_search_message_handlers
 from .channels import button_callback as channels_button_callback
 from .channels import command as channels
 from .channels import message_handlers as channels_message_handlers
 from .groups import button_callback as groups_button_callback
 from .groups import command as groups
 from .groups import message_handlers as groups_message_handlers
+from .inline import command as select
+from .inline import inline_query_handlers
 from .posts import button_callback as posts_button_callback
 from .posts import command as posts
+from .report import command as db_report_command
+from .search import button_callback as search_button_callback
+from .search import command as search
 from .start import command as start
+from .templates import command as template
 from .user import command as add_user_command
 from .delete import command as delete_user_command
 from .update import command as update_user_role_command
@@ -17,12 +31,35 @@ commands = [
     channels,
     groups,
     posts,
+    search,
+    edit_post,
+    delete_post,
+    select,
+    template,
     add_user_command,  # Команда добавления пользователя
     delete_user_command,  # Команда обновления роли пользователя
     update_user_role_command,  # Команда удаления пользователя
     view_user_command,  # Команда удаления пользователя
+    db_report_command,  # Отчёт по запросам к БД
 
 ]
 # Обработчики кнопок
-button_callbacks = [channels_button_callback, groups_button_callback, posts_button_callback]
-message_handlers = channels_message_handlers + groups_message_handlers
+button_callbacks = [
+    channels_button_callback,
+    groups_button_callback,
+    posts_button_callback,
+    search_button_callback,
+    broadcasts_button_callback,
+    *channel_search_button_callbacks,
+    *channel_import_button_callbacks,
+]
+message_handlers = (
+    channel_search_message_handlers
+    + channel_import_message_handlers
+    + channels_message_handlers
+    + groups_message_handlers
+)
+# Обработчики inline-запросов
+inline_queries = inline_query_handlers
+# Обработчики изменений в каналах (статус бота, название)
+chat_handlers = channel_sync_handlers
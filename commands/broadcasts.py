@@ -0,0 +1,126 @@
+from logging import getLogger
+
+from telegram import BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import CommandHandler, ContextTypes
+
+from database import get_broadcast_user, get_deliveries, get_user
+from utils.broadcasts import delete_broadcast, edit_broadcast
+from utils.functions import get_callback_query_context, get_message_context, get_user_context
+from utils.progress import ProgressReporter
+
+logger = getLogger(__name__)
+
+EDIT_USAGE = 'Использование: /edit_post номер новый текст\nНомер рассылки есть в результатах /search.'
+DELETE_USAGE = 'Использование: /delete_post номер\nНомер рассылки есть в результатах /search.'
+
+
+def can_change_broadcast(user_id: int, broadcast_id: int) -> bool:
+    """Менять рассылку может её автор или администратор."""
+    user = get_user(user_id)
+
+    if not user or user.role == 'user':
+        return False
+
+    owner = get_broadcast_user(broadcast_id)
+
+    return owner is not None and (owner == user_id or user.role == 'admin')
+
+
+def format_result(action: str, done: list[int], failed: list[int]) -> str:
+    text = f'Рассылка {action} в {len(done)} из {len(done) + len(failed)} каналов.'
+
+    if failed:
+        text += '\nНе получилось в каналах, где у бота нет прав или сообщение слишком старое.'
+
+    return text
+
+
+async def edit_post(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+    message = await get_message_context(update, context)
+
+    # Текст берём из сообщения целиком, чтобы сохранить переносы строк и разметку
+    args = (message.text or '').split(maxsplit=2)
+
+    if len(args) < 3 or not args[1].isdigit():
+        return await message.reply_text(EDIT_USAGE)
+
+    broadcast_id, text = int(args[1]), args[2].strip()
+
+    if not can_change_broadcast(sender.id, broadcast_id):
+        return await message.reply_text('Рассылка не найдена.')
+
+    logger.info(f'User {sender.id} is editing broadcast {broadcast_id}')
+
+    total = len(get_deliveries(broadcast_id))
+    status = await message.reply_text(f'Изменяю рассылку [0/{total}]')
+    progress = ProgressReporter(status.edit_text, 'Изменяю рассылку', total)
+
+    done, failed = await edit_broadcast(context.bot, broadcast_id, text, progress)
+
+    await status.delete()
+    return await message.reply_text(format_result('изменена', done, failed))
+
+
+async def delete_post(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+    message = await get_message_context(update, context)
+
+    args = context.args or []
+
+    if len(args) != 1 or not args[0].isdigit():
+        return await message.reply_text(DELETE_USAGE)
+
+    broadcast_id = int(args[0])
+
+    if not can_change_broadcast(sender.id, broadcast_id):
+        return await message.reply_text('Рассылка не найдена.')
+
+    total = len(get_deliveries(broadcast_id))
+    reply_markup = InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton('🗑 Удалить', callback_data=f'broadcast_delete_{broadcast_id}'),
+                InlineKeyboardButton('Отмена', callback_data='broadcast_delete_cancel'),
+            ]
+        ]
+    )
+
+    return await message.reply_text(
+        f'Удалить рассылку #{broadcast_id} из {total} каналов?', reply_markup=reply_markup
+    )
+
+
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = await get_callback_query_context(update, context)
+    data = query.data or ''
+
+    if not data.startswith('broadcast_delete_'):
+        return
+
+    if data == 'broadcast_delete_cancel':
+        await query.edit_message_text('Удаление отменено.')
+        return await query.answer()
+
+    user = query.from_user
+    broadcast_id = int(data.removeprefix('broadcast_delete_'))
+
+    if not can_change_broadcast(user.id, broadcast_id):
+        return await query.answer('Рассылка не найдена.')
+
+    logger.info(f'User {user.id} is deleting broadcast {broadcast_id}')
+    await query.answer()
+
+    total = len(get_deliveries(broadcast_id))
+    await query.edit_message_text(f'Удаляю рассылку [0/{total}]')
+    progress = ProgressReporter(query.edit_message_text, 'Удаляю рассылку', total)
+
+    done, failed = await delete_broadcast(context.bot, broadcast_id, progress)
+
+    return await query.edit_message_text(format_result('удалена', done, failed))
+
+
+edit_handler = CommandHandler('edit_post', edit_post)
+delete_handler = CommandHandler('delete_post', delete_post)
+edit_command = (BotCommand('edit_post', 'Исправить отправленную рассылку'), edit_handler)
+delete_command = (BotCommand('delete_post', 'Удалить отправленную рассылку'), delete_handler)
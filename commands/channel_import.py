@@ -0,0 +1,189 @@
+import asyncio
+from io import BytesIO
+from logging import getLogger
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.constants import ChatType
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from config.environment import settings
+from database import get_existing_channel_ids, get_user, save_channels
+from utils.functions import get_callback_query_context
+
+logger = getLogger(__name__)
+
+USAGE = (
+    'Отправьте .txt файл со списком каналов, по одному в строке: '
+    'id канала (-100...), @username или ссылка https://t.me/username'
+)
+
+
+def parse_channel_ref(line: str) -> int | str:
+    """id канала или @username из строки файла импорта."""
+    ref = line.strip().removeprefix('https://').removeprefix('http://').removeprefix('t.me/')
+
+    if ref.lstrip('-').isdigit():
+        return int(ref)
+
+    if ref.startswith('+') or ref.startswith('joinchat/'):
+        raise ValueError('приватные ссылки-приглашения не поддерживаются')
+
+    ref = ref.removeprefix('@').split('/')[0]
+
+    if not ref:
+        raise ValueError('пустая строка')
+
+    return f'@{ref}'
+
+
+async def verify_channel(context: ContextTypes.DEFAULT_TYPE, ref: int | str, semaphore: asyncio.Semaphore):
+    """Проверить, что бот администратор канала: `(channel_id, название, ссылка)` или текст ошибки."""
+    async with semaphore:
+        try:
+            chat = await context.bot.get_chat(ref, rate_limit_args={'lane': 'background'})
+
+            if chat.type != ChatType.CHANNEL:
+                return 'это не канал'
+
+            member = await context.bot.get_chat_member(
+                chat.id, context.bot.id, rate_limit_args={'lane': 'background'}
+            )
+        except TelegramError as e:
+            return f'канал недоступен ({e.message})'
+
+    if member.status not in ('administrator', 'creator'):
+        return 'бот не администратор или создатель канала'
+
+    link = chat.link or chat.invite_link
+
+    if not chat.title or not link:
+        return 'не удалось получить название или ссылку'
+
+    return chat.id, chat.title, link
+
+
+async def import_channels(update: Update, context: ContextTypes.DEFAULT_TYPE, lines: list[str]):
+    user = update.effective_user
+
+    if not user:
+        raise Exception('User can not be fetched')
+
+    report: list[str] = []
+    refs: list[tuple[str, int | str]] = []
+
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+
+        try:
+            refs.append((line.strip(), parse_channel_ref(line)))
+        except ValueError as e:
+            report.append(f'{line.strip()} - ошибка: {e}')
+
+    semaphore = asyncio.Semaphore(settings.CHANNEL_IMPORT_CONCURRENCY)
+    results = await asyncio.gather(*(verify_channel(context, ref, semaphore) for _, ref in refs))
+
+    verified = {}
+
+    for (line, _), result in zip(refs, results, strict=True):
+        if isinstance(result, str):
+            report.append(f'{line} - ошибка: {result}')
+        elif result[0] in verified:
+            report.append(f'{line} - повтор в файле')
+        else:
+            verified[result[0]] = (line, result)
+
+    existing = get_existing_channel_ids(list(verified))
+    new_channels = [
+        channel for channel_id, (_, channel) in verified.items() if channel_id not in existing
+    ]
+    saved = set(save_channels(user.id, new_channels))
+
+    for channel_id, (line, (_, title, _)) in verified.items():
+        if channel_id in saved:
+            report.append(f'{line} - добавлен: {title}')
+        else:
+            report.append(f'{line} - канал уже добавлен')
+
+    logger.info(f'User {user.id} imported {len(saved)} of {len(refs)} channels')
+
+    return len(saved), report
+
+
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = await get_callback_query_context(update, context)
+
+    if query.data not in ('channels_import', 'channels_import_cancel'):
+        return
+
+    if not isinstance(context.user_data, dict):
+        raise Exception('User data can not be fetched')
+
+    if query.data == 'channels_import_cancel':
+        context.user_data.pop('is_importing_channels', None)
+
+        await query.edit_message_text('Импорт каналов отменён.')
+        return await query.answer()
+
+    context.user_data['is_importing_channels'] = True
+    reply_markup = InlineKeyboardMarkup(
+        [[InlineKeyboardButton('Отмена', callback_data='channels_import_cancel')]]
+    )
+
+    await query.edit_message_text(USAGE, reply_markup=reply_markup)
+    return await query.answer()
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    message = update.message
+
+    if not user or not message or not context.user_data:
+        return
+
+    if not context.user_data.get('is_importing_channels'):
+        return
+
+    # Любое другое сообщение отменяет импорт и обрабатывается как обычно
+    if not message.document:
+        context.user_data['is_importing_channels'] = False
+        return
+
+    db_user = get_user(user.id)
+
+    if not db_user or db_user.role not in ('admin', 'operator'):
+        context.user_data['is_importing_channels'] = False
+        return await message.reply_text('У вас нет доступа к импорту каналов')
+
+    file = await message.document.get_file()
+    content = await file.download_as_bytearray()
+
+    try:
+        lines = content.decode('utf-8-sig').splitlines()
+    except UnicodeDecodeError:
+        return await message.reply_text('Файл должен быть в кодировке UTF-8')
+
+    if len(lines) > settings.CHANNEL_IMPORT_MAX_ROWS:
+        return await message.reply_text(
+            f'Слишком много строк: {len(lines)}, максимум {settings.CHANNEL_IMPORT_MAX_ROWS}'
+        )
+
+    context.user_data['is_importing_channels'] = False
+    status = await message.reply_text(f'Проверяю каналы из файла ({len(lines)} строк)...')
+
+    added, report = await import_channels(update, context, lines)
+
+    file_like_object = BytesIO('\n'.join(report).encode('utf-8'))
+    file_like_object.name = 'import_report.txt'
+
+    await status.edit_text(f'Импорт завершён. Добавлено каналов: {added}')
+    return await message.reply_document(document=file_like_object)
+
+
+button_callbacks = [
+    button_callback,
+]
+message_handlers = [
+    handle_message,
+]
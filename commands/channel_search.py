@@ -0,0 +1,81 @@
+from logging import getLogger
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from commands.channels import channels
+from commands.groups import group_add, group_channels_add_toggle
+from commands.posts import posts
+from utils.functions import get_callback_query_context
+
+logger = getLogger(__name__)
+
+# Клавиатура выбора каналов -> (функция отрисовки, ключ страницы в user_data)
+SEARCH_TARGETS = {
+    'channels': (channels, 'channels_page'),
+    'posts': (posts, 'posts_channels_page'),
+    'group_add': (group_add, 'group_channels_page'),
+    'group_channels_add': (group_channels_add_toggle, 'channels_page'),
+}
+
+
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    query = await get_callback_query_context(update, context)
+
+    if not user or not isinstance(context.user_data, dict):
+        raise Exception('User data can not be fetched')
+
+    data = query.data or ''
+
+    if data.startswith('channel_search_clear_'):
+        target = data.removeprefix('channel_search_clear_')
+
+        if target not in SEARCH_TARGETS:
+            return
+
+        render, page_key = SEARCH_TARGETS[target]
+        context.user_data.pop(f'{target}_search', None)
+        context.user_data[page_key] = 0
+
+        logger.info(f'User {user.id} cleared channel search in {target}')
+        return await render(update, context)
+
+    if data.startswith('channel_search_'):
+        target = data.removeprefix('channel_search_')
+
+        if target not in SEARCH_TARGETS:
+            return
+
+        context.user_data['channel_search_target'] = target
+
+        await query.edit_message_text('Отправьте часть названия канала')
+        return await query.answer()
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    message = update.message
+
+    if not user or not message or not message.text or not context.user_data:
+        return
+
+    target = context.user_data.pop('channel_search_target', None)
+
+    if target not in SEARCH_TARGETS:
+        return
+
+    render, page_key = SEARCH_TARGETS[target]
+    context.user_data[f'{target}_search'] = message.text.strip()
+    context.user_data[page_key] = 0
+
+    logger.info(f'User {user.id} is searching channels in {target}')
+    return await render(update, context)
+
+
+button_callbacks = [
+    button_callback,
+]
+message_handlers = [
+    handle_message,
+]
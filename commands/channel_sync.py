@@ -0,0 +1,84 @@
+from logging import getLogger
+
+from telegram import ChatMemberAdministrator, ChatMemberOwner, ChatMemberUpdated, Update
+from telegram.constants import ChatType
+from telegram.ext import ChatMemberHandler, ContextTypes, MessageHandler, filters
+
+from database import get_channel, get_user, save_channel, set_channels_health, update_channel_info
+
+logger = getLogger(__name__)
+
+
+def get_bot_status(member_update: ChatMemberUpdated) -> tuple[str, bool]:
+    """Статус бота после изменения и может ли он публиковать в канале."""
+    member = member_update.new_chat_member
+
+    if isinstance(member, ChatMemberOwner):
+        return member.status, True
+
+    if isinstance(member, ChatMemberAdministrator):
+        if not member.can_post_messages:
+            return 'no_post_rights', False
+
+        return member.status, True
+
+    return member.status, False
+
+
+async def my_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    member_update = update.my_chat_member
+
+    if not member_update or member_update.chat.type != ChatType.CHANNEL:
+        return
+
+    chat = member_update.chat
+    bot_status, is_reachable = get_bot_status(member_update)
+    channel = get_channel(chat.id)
+
+    if channel:
+        logger.info(f'Bot status in channel {chat.id} changed to {bot_status}')
+        set_channels_health([(chat.id, bot_status, is_reachable)])
+
+        if chat.title and chat.title != channel.channel_name:
+            update_channel_info(chat.id, chat.title, chat.link)
+
+        return
+
+    if not is_reachable:
+        return
+
+    # Бота сделали администратором нового канала: добавляем канал тому, кто это сделал
+    user = get_user(member_update.from_user.id)
+
+    if not user or user.role not in ('admin', 'operator'):
+        return
+
+    link = chat.link or (await context.bot.get_chat(chat.id)).invite_link
+
+    if not chat.title or not link:
+        logger.error(f'Channel {chat.id} title or link can not be fetched')
+        return
+
+    save_channel(user.user_id, chat.id, chat.title, link)
+    logger.info(f'Channel {chat.id} is added by user {user.user_id} via bot promotion')
+
+    await context.bot.send_message(user.user_id, f'Канал {chat.title} добавлен автоматически')
+
+
+async def channel_title(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    message = update.channel_post
+
+    if not message or not message.new_chat_title:
+        return
+
+    if not get_channel(message.chat.id):
+        return
+
+    logger.info(f'Channel {message.chat.id} is renamed')
+    update_channel_info(message.chat.id, message.new_chat_title, message.chat.link)
+
+
+handlers = [
+    ChatMemberHandler(my_chat_member, ChatMemberHandler.MY_CHAT_MEMBER),
+    MessageHandler(filters.UpdateType.CHANNEL_POST & filters.StatusUpdate.NEW_CHAT_TITLE, channel_title),
+]
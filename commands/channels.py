@@ -15,24 +15,27 @@ from telegram import (
 )
 from telegram.ext import CommandHandler, ContextTypes
 
+from config.log import SAMPLED
 from database import (
     delete_channel,
     get_channel,
     get_channels,
     get_channels_by_user,
     get_user_channels,
-    get_total_user_channels,
     get_total_channels,
     get_user,
     save_channel,
+    search_user_channels,
 )
 from utils.functions import (
     get_callback_query_context,
     get_message_context,
+    get_user_channels_page,
     get_user_context,
     get_user_data_context,
     send_messages_to_channels,
 )
+from utils.progress import ProgressReporter
 
 logger = getLogger(__name__)
 
@@ -58,13 +61,19 @@ async def channels(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if page < 0:
         page = 0
 
-    logger.info(f'User {sender.id} requested channels [Page: {page+1}]')
+    logger.info(f'User {sender.id} requested channels [Page: {page+1}]', extra=SAMPLED)
 
-    db_channels_count = get_total_user_channels(sender.id)
-    db_channels = get_user_channels(sender.id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE)
+    search_text = user_data.get('channels_search')
+    db_channels, db_channels_count = get_user_channels_page(
+        sender.id, page, CHANNELS_PER_PAGE, search_text
+    )
 
     keyboard = []
     navigation_buttons = []
+    search_buttons = [
+        InlineKeyboardButton('🔍 Поиск', callback_data='channel_search_channels'),
+        InlineKeyboardButton('🔎 Выбрать через поиск', switch_inline_query_current_chat=''),
+    ]
     channels_buttons = []
     action_buttons = []
 
@@ -94,6 +103,9 @@ async def channels(update: Update, context: ContextTypes.DEFAULT_TYPE):
         channels_buttons.append(
             InlineKeyboardButton('🗑 Удалить канал', callback_data='channels_delete')
         )
+        channels_buttons.append(
+            InlineKeyboardButton('📥 Импорт из файла', callback_data='channels_import')
+        )
 
     if len(selected_channels) != db_channels_count:
         action_buttons.append(
@@ -110,23 +122,27 @@ async def channels(update: Update, context: ContextTypes.DEFAULT_TYPE):
             InlineKeyboardButton('⬇️ Скачать список каналов', callback_data='channels_download')
         )
 
+    if search_text:
+        search_buttons.append(
+            InlineKeyboardButton('✖️ Сбросить поиск', callback_data='channel_search_clear_channels')
+        )
+
     keyboard.append(navigation_buttons)
+    keyboard.append(search_buttons)
     keyboard.append(channels_buttons)
     keyboard.append(action_buttons)
 
     reply_markup = InlineKeyboardMarkup(keyboard)
+    text = f'Выберите каналы для отправки: Всего каналов - {db_channels_count}'
+
+    if search_text:
+        text += f'\nПоиск: «{search_text}»'
 
     if message:
-        await message.reply_text(
-            f'Выберите каналы для отправки: Всего каналов - {db_channels_count}',
-            reply_markup=reply_markup,
-        )
+        await message.reply_text(text, reply_markup=reply_markup)
 
     elif query:
-        await query.edit_message_text(
-            f'Выберите каналы для отправки: Всего каналов - {db_channels_count}',
-            reply_markup=reply_markup,
-        )
+        await query.edit_message_text(text, reply_markup=reply_markup)
         await query.answer()
 
     else:
@@ -171,8 +187,10 @@ async def channels_download(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f'User {user.id} downloading {len(selected_channels)} channels')
 
     text = ''
+    progress = ProgressReporter(query.edit_message_text, 'Обрабатываю каналы.', len(selected_channels))
+
     for idx, channel_id in enumerate(selected_channels, start=1):
-        await query.edit_message_text(f'Обрабатываю каналы. [{idx}/{len(selected_channels)}]')
+        await progress.update(idx)
 
         channel = get_channel(channel_id)
 
@@ -321,6 +339,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             media_group.append(InputMediaAudio(media=message.voice.file_id))
 
         media_group_data['media'] += media_group
+        media_group_data.setdefault('message_ids', []).append(message.message_id)
 
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -348,6 +367,20 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif data == 'channels_all':
         logger.info(f'User {user.id} selected all channels')
 
+        search_text = context.user_data.get('channels_search')
+
+        if search_text:
+            # При активном поиске добавляем к выбору только найденные каналы
+            selected_channels = context.user_data.get('selected_channels', [])
+            selected_channels += [
+                channel.channel_id
+                for channel in search_user_channels(user.id, search_text)
+                if channel.channel_id not in selected_channels
+            ]
+            context.user_data['selected_channels'] = selected_channels
+
+            return await channels(update, context)
+
         # Получаем только доступные пользователю каналы
         accessible_channels = [
             channel.channel_id for channel in get_user_channels(user.id)
@@ -391,10 +424,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_checked = channel_id in selected_channels
 
         if not is_checked:
-            logger.info(f'User {user.id} selected channel {channel_id}')
+            logger.info(f'User {user.id} selected channel {channel_id}', extra=SAMPLED)
             selected_channels.append(channel_id)
         else:
-            logger.info(f'User {user.id} unselected channel {channel_id}')
+            logger.info(f'User {user.id} unselected channel {channel_id}', extra=SAMPLED)
             selected_channels.remove(channel_id)
 
         context.user_data['selected_channels'] = selected_channels
@@ -14,15 +14,14 @@ from telegram import (
 )
 from telegram.ext import CommandHandler, ContextTypes
 
+from config.log import SAMPLED
 from database import (
     get_channel,
-    get_channels,
     get_channels_by_group,
+    get_group_channel_ids,
     get_groups,
     delete_group_if_no_channels,
-    get_total_channels,
     get_user_channels,
-    get_total_user_channels,
     get_total_channels_for_group,
     get_total_groups,
     get_user,
@@ -31,14 +30,17 @@ from database import (
     group_delete_channels,
     new_group_channel_save,
     new_group_name,
+    search_user_channels,
 )
 from utils.functions import (
     get_callback_query_context,
     get_message_context,
+    get_user_channels_page,
     get_user_context,
     get_user_data_context,
     send_messages_to_channels,
 )
+from utils.progress import ProgressReporter
 
 logger = getLogger(__name__)
 
@@ -67,7 +69,7 @@ async def groups(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if page < 0:
         page = 0
 
-    logger.info(f'User {sender.id} requested groups [Page: {page + 1}]')
+    logger.info(f'User {sender.id} requested groups [Page: {page + 1}]', extra=SAMPLED)
 
     db_groups_count = get_total_groups(user_id=sender.id)
     db_groups = get_groups(user_id=sender.id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE)
@@ -132,7 +134,7 @@ async def group_channels(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if page < 0:
         page = 0
 
-    logger.info(f'User {user.id} requested channels of group: {group_id} [Page: {page + 1}]')
+    logger.info(f'User {user.id} requested channels of group: {group_id} [Page: {page + 1}]', extra=SAMPLED)
 
     # Проверяем количество каналов в группе
     total_channels = get_total_channels_for_group(group_id)
@@ -309,7 +311,7 @@ async def group_change_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def group_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = await get_user_context(update, context)
     user_data = context.user_data
-    callback_data = await get_callback_query_context(update, context)
+    callback_data = update.callback_query
 
     if not user_data:
         user_data = {
@@ -324,11 +326,14 @@ async def group_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if page < 0:
         page = 0
 
-    logger.info(f'User {user.id} requested channels to add to group [Page: {page+1}]')
+    logger.info(f'User {user.id} requested channels to add to group [Page: {page+1}]', extra=SAMPLED)
 
-    db_channels = get_user_channels(user.id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE)
+    search_text = user_data.get('group_add_search')
+    db_channels, db_channels_count = get_user_channels_page(
+        user.id, page, CHANNELS_PER_PAGE, search_text
+    )
 
-    if not db_channels:
+    if not db_channels and callback_data:
         return await callback_data.answer('Нет каналов.')
 
     keyboard = []
@@ -348,12 +353,12 @@ async def group_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
             InlineKeyboardButton('⬅️ Предыдущая', callback_data='new_group_channels_prev_page')
         )
 
-    if (page + 1) * CHANNELS_PER_PAGE < len(get_channels(-1)):
+    if (page + 1) * CHANNELS_PER_PAGE < db_channels_count:
         navigation_buttons.append(
             InlineKeyboardButton('Следующая ➡️', callback_data='new_group_channels_next_page')
         )
 
-    if len(group_add_channels) != len(get_channels(-1)):
+    if len(group_add_channels) != db_channels_count:
         navigation_buttons.append(
             InlineKeyboardButton('✅ Выбрать все каналы', callback_data='new_group_select_all')
         )
@@ -364,6 +369,15 @@ async def group_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     keyboard.append(navigation_buttons)
+
+    search_buttons = [InlineKeyboardButton('🔍 Поиск', callback_data='channel_search_group_add')]
+
+    if search_text:
+        search_buttons.append(
+            InlineKeyboardButton('✖️ Сбросить поиск', callback_data='channel_search_clear_group_add')
+        )
+
+    keyboard.append(search_buttons)
     buttons = [
         InlineKeyboardButton('Создать группу', callback_data='new_group_save'),
         InlineKeyboardButton('🏠 Главное меню', callback_data='group_menu_button'),
@@ -371,78 +385,25 @@ async def group_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     keyboard += chunk_button(buttons, 2)
     reply_markup = InlineKeyboardMarkup(keyboard)
+    text = 'Выберите каналы для новой группы'
+
+    if search_text:
+        text += f'\nПоиск: «{search_text}»'
+
+    if not callback_data:
+        message = await get_message_context(update, context)
+        return await message.reply_text(text, reply_markup=reply_markup)
 
     try:
-        await callback_data.edit_message_text(
-            'Выберите каналы для новой группы',
-            reply_markup=reply_markup,
-        )
+        await callback_data.edit_message_text(text, reply_markup=reply_markup)
     except Exception as e:
         logger.error(f'Failed to edit message: {e}')
         return await callback_data.answer('Не удалось обновить сообщение.')
 
 
 async def group_add_toggle(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = await get_user_context(update, context)
-    user_data = context.user_data
-    callback_data = await get_callback_query_context(update, context)
-
-    if not user_data:
-        user_data = {
-            'group_channels_page': 0,
-            'group_add_channels': [],
-        }
-
-    group_id = user_data.get('selected_group_id', 0)
-    group_add_channels = user_data.get('group_add_channels', [])
-    page = int(user_data.get('group_channels_page', 0))
-
-    if page < 0:
-        page = 0
-
-    logger.info(f'User {user.id} requested channels to add of group: {group_id} [Page: {page+1}]')
-
-    db_channels = get_user_channels(sender.id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE)
-
-    if not db_channels:
-        return await callback_data.answer('Нет каналов.')
-
-    keyboard = []
-    navigation_buttons = []
-
-    for channel in db_channels:
-        checkmark = '✅' if channel.channel_id in group_add_channels else '❌'
-        channel_button = InlineKeyboardButton(
-            f'{checkmark} {channel.channel_name}',
-            callback_data=f'group_add_toggle_{channel.channel_id}',
-        )
-        link_button = InlineKeyboardButton('🔗 Перейти', url=f'https://t.me/{channel.channel_link}')
-        keyboard.append([channel_button, link_button])
-
-    if page > 0:
-        navigation_buttons.append(
-            InlineKeyboardButton('⬅️ Предыдущая', callback_data='group_channels_prev_page')
-        )
-
-    if (page + 1) * CHANNELS_PER_PAGE < get_total_channels_for_group(group_id):
-        navigation_buttons.append(
-            InlineKeyboardButton('Следующая ➡️', callback_data='group_channels_next_page')
-        )
-
-    keyboard.append(navigation_buttons)
-    buttons = [
-        InlineKeyboardButton('Создать группу', callback_data='new_group_save'),
-        InlineKeyboardButton('🏠 Главное меню', callback_data='group_menu_button'),
-    ]
-
-    keyboard += chunk_button(buttons, 2)
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    await callback_data.edit_message_text(
-        f'Выберите каналы для новой группы:',
-        reply_markup=reply_markup,
-    )
-    return await callback_data.answer()
+    """Выбор каналов новой группы — та же клавиатура с поиском, что и в group_add."""
+    return await group_add(update, context)
 
 
 async def new_group_save(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -480,7 +441,7 @@ async def group_menu_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     page = user_data.get('groups_page', 0)
 
-    logger.info(f'User {sender.id} requested groups [Page: {page + 1}]')
+    logger.info(f'User {sender.id} requested groups [Page: {page + 1}]', extra=SAMPLED)
 
     if page < 0:
         page = 0
@@ -570,8 +531,10 @@ async def group_channels_add_toggle(update: Update, context: ContextTypes.DEFAUL
     if page < 0:
         page = 0
 
-    db_channels_count = get_total_user_channels(sender.id)
-    db_channels = get_user_channels(sender.id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE)
+    search_text = user_data.get('group_channels_add_search')
+    db_channels, db_channels_count = get_user_channels_page(
+        sender.id, page, CHANNELS_PER_PAGE, search_text
+    )
 
     keyboard = []
     navigation_buttons = []
@@ -596,21 +559,41 @@ async def group_channels_add_toggle(update: Update, context: ContextTypes.DEFAUL
             InlineKeyboardButton('Следующая ➡️', callback_data='group_channels_add_toggle_next_page')
         )
 
+    search_buttons = [
+        InlineKeyboardButton('🔍 Поиск', callback_data='channel_search_group_channels_add')
+    ]
+
+    if search_text:
+        search_buttons.append(
+            InlineKeyboardButton(
+                '✖️ Сбросить поиск', callback_data='channel_search_clear_group_channels_add'
+            )
+        )
+
     buttons = [InlineKeyboardButton('Добавить канал', callback_data='group_channels_add_toggle')]
 
     keyboard.append(navigation_buttons)
+    keyboard.append(search_buttons)
     keyboard += chunk_button(buttons, 2)
 
     reply_markup = InlineKeyboardMarkup(keyboard)
+    text = 'Добавляем каналы в группу'
+
+    if search_text:
+        text += f'\nПоиск: «{search_text}»'
 
     if callback_query:
-        logger.info(f'User {sender.id} requested channels (page: {page + 1})')
+        logger.info(f'User {sender.id} requested channels (page: {page + 1})', extra=SAMPLED)
 
         await callback_query.edit_message_text(
-            f'Добавляем каналы в группу',
+            text,
             reply_markup=reply_markup,
         )
         await callback_query.answer()
+    else:
+        # Клавиатура после поиска: ответ на сообщение с запросом
+        message = await get_message_context(update, context)
+        await message.reply_text(text, reply_markup=reply_markup)
 
 
 async def group_channels_delete_toggle(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -630,7 +613,7 @@ async def group_channels_delete_toggle(update: Update, context: ContextTypes.DEF
 
     page = user_data.get('channels_page', 0)
 
-    db_channels_count = get_total_channels()
+    db_channels_count = get_total_channels_for_group(group_id)
     db_channels = get_channels_by_group(
         group_id=group_id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE
     )
@@ -668,7 +651,7 @@ async def group_channels_delete_toggle(update: Update, context: ContextTypes.DEF
     reply_markup = InlineKeyboardMarkup(keyboard)
 
     if callback_query:
-        logger.info(f'User {sender.id} requested channels (page: {page + 1})')
+        logger.info(f'User {sender.id} requested channels (page: {page + 1})', extra=SAMPLED)
 
         await callback_query.edit_message_text(
             f'Удаляем каналы из группы',
@@ -756,8 +739,10 @@ async def group_channels_download(update: Update, context: ContextTypes.DEFAULT_
     logger.info(f'User {user.id} downloading {len(selected_channels)} channels')
 
     text = ''
+    progress = ProgressReporter(query.edit_message_text, 'Обрабатываю каналы.', len(selected_channels))
+
     for idx, channel_id in enumerate(selected_channels, start=1):
-        await query.edit_message_text(f'Обрабатываю каналы. [{idx}/{len(selected_channels)}]')
+        await progress.update(idx)
 
         channel = get_channel(channel_id)
 
@@ -885,10 +870,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_checked = channel_id in group_add_channels
 
         if not is_checked:
-            logger.info(f'User {user.id} selected channel {channel_id}')
+            logger.info(f'User {user.id} selected channel {channel_id}', extra=SAMPLED)
             group_add_channels.append(channel_id)
         else:
-            logger.info(f'User {user.id} unselected channel {channel_id}')
+            logger.info(f'User {user.id} unselected channel {channel_id}', extra=SAMPLED)
             group_add_channels.remove(channel_id)
 
         context.user_data['group_add_channels'] = group_add_channels
@@ -909,12 +894,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             }
 
         group_id = user_data.get('selected_group_id', 0)
-        selected_channels = []
-
-        for channel in get_channels_by_group(group_id, -1):
-            selected_channels.append(channel.channel_id)
-
-        context.user_data['selected_group_channels'] = selected_channels
+        context.user_data['selected_group_channels'] = list(get_group_channel_ids(group_id))
 
         return await group_channels(update, context)
 
@@ -929,9 +909,19 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         group_id = user_data.get('selected_group_id', 0)
         selected_channels = []
+        search_text = user_data.get('group_add_search')
 
         # Получаем каналы, доступные только текущему пользователю
-        user_channels = get_user_channels(user.id)  # Получаем каналы пользователя
+        if search_text:
+            # При активном поиске добавляем к выбору только найденные каналы
+            selected_channels = list(user_data.get('group_add_channels', []))
+            user_channels = [
+                channel
+                for channel in search_user_channels(user.id, search_text)
+                if channel.channel_id not in selected_channels
+            ]
+        else:
+            user_channels = get_user_channels(user.id)  # Получаем каналы пользователя
 
         # Добавляем каналы в список только если они доступны для пользователя
         for channel in user_channels:
@@ -977,10 +967,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_checked = channel_id in selected_group_channels_add
 
         if not is_checked:
-            logger.info(f'User {user.id} selected channel {channel_id}')
+            logger.info(f'User {user.id} selected channel {channel_id}', extra=SAMPLED)
             selected_group_channels_add.append(channel_id)
         else:
-            logger.info(f'User {user.id} unselected channel {channel_id}')
+            logger.info(f'User {user.id} unselected channel {channel_id}', extra=SAMPLED)
             selected_group_channels_add.remove(channel_id)
 
         context.user_data['selected_group_channels_add'] = selected_group_channels_add
@@ -994,10 +984,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_checked = channel_id in selected_group_channels_add
 
         if not is_checked:
-            logger.info(f'User {user.id} selected channel {channel_id}')
+            logger.info(f'User {user.id} selected channel {channel_id}', extra=SAMPLED)
             selected_group_channels_add.append(channel_id)
         else:
-            logger.info(f'User {user.id} unselected channel {channel_id}')
+            logger.info(f'User {user.id} unselected channel {channel_id}', extra=SAMPLED)
             selected_group_channels_add.remove(channel_id)
 
         context.user_data['selected_group_channels_add'] = selected_group_channels_add
@@ -1011,10 +1001,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_checked = channel_id in selected_group_channels
 
         if not is_checked:
-            logger.info(f'User {user.id} selected channel {channel_id}')
+            logger.info(f'User {user.id} selected channel {channel_id}', extra=SAMPLED)
             selected_group_channels.append(channel_id)
         else:
-            logger.info(f'User {user.id} unselected channel {channel_id}')
+            logger.info(f'User {user.id} unselected channel {channel_id}', extra=SAMPLED)
             selected_group_channels.remove(channel_id)
 
         context.user_data['selected_group_channels'] = selected_group_channels
@@ -1115,6 +1105,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             media_group.append(InputMediaAudio(media=message.voice.file_id))
 
         media_group_data['media'] += media_group
+        media_group_data.setdefault('message_ids', []).append(message.message_id)
 
     if user_data.get('is_waiting_group_name', False):
         if not message.text:
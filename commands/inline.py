@@ -0,0 +1,123 @@
+from logging import getLogger
+
+from telegram import (
+    BotCommand,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Update,
+)
+from telegram.ext import CommandHandler, ContextTypes
+
+from commands.channels import channels
+from config.environment import settings
+from database import get_channel, get_group_channel_ids, get_user, get_user_targets
+from utils.functions import get_message_context, get_user_context
+
+logger = getLogger(__name__)
+
+# Telegram принимает не больше 50 результатов за один ответ
+RESULTS_PER_PAGE = 50
+
+TARGET_ICONS = {
+    'channel': '📢',
+    'group': '📁',
+}
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.inline_query
+
+    if not query:
+        return
+
+    user = get_user(query.from_user.id)
+
+    if not user or user.role == 'user':
+        return await query.answer([], cache_time=settings.INLINE_CACHE_TIME, is_personal=True)
+
+    text = query.query.strip().lower()
+    offset = int(query.offset) if query.offset.isdigit() else 0
+
+    targets = [
+        target for target in get_user_targets(user.user_id) if text in target[2].lower()
+    ]
+    page = targets[offset : offset + RESULTS_PER_PAGE]
+    next_offset = offset + RESULTS_PER_PAGE
+
+    results = [
+        InlineQueryResultArticle(
+            id=f'{kind}_{target_id}',
+            title=f'{TARGET_ICONS[kind]} {name}',
+            description='Канал' if kind == 'channel' else 'Группа каналов',
+            input_message_content=InputTextMessageContent(f'/select {kind} {target_id}'),
+        )
+        for kind, target_id, name in page
+    ]
+
+    return await query.answer(
+        results,
+        cache_time=settings.INLINE_CACHE_TIME,
+        is_personal=True,
+        next_offset=str(next_offset) if next_offset < len(targets) else '',
+    )
+
+
+async def select(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+    message = await get_message_context(update, context)
+
+    user = get_user(sender.id)
+
+    if not user or user.role == 'user':
+        return await message.reply_text('У вас нет доступа к данному боту. Для доступа обратитесь к @Prosto_Durachok')
+
+    if not isinstance(context.user_data, dict):
+        raise Exception('User data can not be fetched')
+
+    args = context.args or []
+
+    if len(args) != 2 or args[0] not in TARGET_ICONS or not args[1].lstrip('-').isdigit():
+        return await message.reply_text('Выберите канал или группу через inline-поиск')
+
+    kind, target_id = args[0], int(args[1])
+    selected_channels: list = context.user_data.get('selected_channels', [])
+
+    if kind == 'channel':
+        channel = get_channel(target_id)
+
+        if not channel or channel.user_id != sender.id:
+            return await message.reply_text('Канал не найден')
+
+        if target_id in selected_channels:
+            logger.info(f'User {sender.id} unselected channel {target_id} via inline')
+            selected_channels.remove(target_id)
+        else:
+            logger.info(f'User {sender.id} selected channel {target_id} via inline')
+            selected_channels.append(target_id)
+
+    else:
+        user_groups = {
+            group_id for target_kind, group_id, _ in get_user_targets(sender.id) if target_kind == 'group'
+        }
+
+        if target_id not in user_groups:
+            return await message.reply_text('Группа не найдена')
+
+        logger.info(f'User {sender.id} selected group {target_id} via inline')
+        selected_channels += [
+            channel_id
+            for channel_id in get_group_channel_ids(target_id)
+            if channel_id not in selected_channels
+        ]
+
+    context.user_data['selected_channels'] = selected_channels
+
+    return await channels(update, context)
+
+
+handler = CommandHandler('select', select)
+command = (BotCommand('select', 'Выбрать канал или группу'), handler)
+
+inline_query_handlers = [
+    inline_query,
+]
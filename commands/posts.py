@@ -1,19 +1,63 @@
+import asyncio
+from contextlib import closing
+from datetime import datetime, timedelta
 from io import BytesIO
 from logging import getLogger
+from threading import Event
 
 from telegram import BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CommandHandler, ContextTypes
 
 from commands.channels import CHANNELS_PER_PAGE
-from database import get_channels, get_posts, get_total_channels, get_user, get_user_channels, get_total_user_channels
+from config.environment import settings
+from config.log import SAMPLED
+from database import count_posts, get_channels, iter_posts, get_total_channels, get_user, get_user_channels, search_user_channels
 from utils.functions import (
     get_callback_query_context,
+    get_user_channels_page,
     get_user_context,
     get_user_data_context,
 )
+from utils.progress import ProgressReporter
 
 logger = getLogger(__name__)
 
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def parse_period(args: list[str]) -> tuple[datetime | None, datetime | None]:
+    """`/posts [с] [по]` — даты в формате ГГГГ-ММ-ДД, дата окончания включительно."""
+    since = datetime.strptime(args[0], DATE_FORMAT) if len(args) > 0 else None
+    until = datetime.strptime(args[1], DATE_FORMAT) + timedelta(days=1) if len(args) > 1 else None
+
+    return since, until
+
+
+def write_posts(
+    file: BytesIO,
+    channel_ids: list[int],
+    since: datetime | None,
+    until: datetime | None,
+    written: list[int],
+    stop: Event,
+):
+    """Записать посты в файл. Выполняется в потоке, чтобы чтение из базы не блокировало бота.
+
+    Число записанных постов кладётся в `written[0]`, `stop` прерывает выгрузку и закрывает курсор.
+    """
+    with closing(iter_posts(channel_ids, since, until)) as rows:
+        for post in rows:
+            if stop.is_set():
+                break
+
+            channel_link = post.channel_link or ''
+            link = f'https://t.me/{channel_link.split('/')[-1]}'
+
+            file.write(
+                f'{post.channel_name} [{link}]\n- Отправлен: {post.created_at.date()}\n- Текст поста: {post.post_text}\n\n'.encode()
+            )
+            written[0] += 1
+
 
 async def posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
     sender = await get_user_context(update, context)
@@ -31,19 +75,28 @@ async def posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not user and message:
         return await message.reply_text('У вас нет доступа к данному боту. Для доступа обратитесь к @Prosto_Durachok')
 
+    if message and context.args is not None and isinstance(context.user_data, dict):
+        try:
+            context.user_data['posts_period'] = parse_period(context.args or [])
+        except ValueError:
+            return await message.reply_text('Использование: /posts [ГГГГ-ММ-ДД] [ГГГГ-ММ-ДД]')
+
     page = user_data.get('posts_channels_page', 0)
     selected_channels = user_data.get('posts_selected_channels', [])
 
     if page < 0:
         page = 0
 
-    logger.info(f'User {sender.id} requested channels to get posts [Page: {page+1}]')
+    logger.info(f'User {sender.id} requested channels to get posts [Page: {page+1}]', extra=SAMPLED)
 
-    db_channels_count = get_total_user_channels(sender.id)
-    db_channels = get_user_channels(sender.id, limit=CHANNELS_PER_PAGE, offset=page * CHANNELS_PER_PAGE)
+    search_text = user_data.get('posts_search')
+    db_channels, db_channels_count = get_user_channels_page(
+        sender.id, page, CHANNELS_PER_PAGE, search_text
+    )
 
     keyboard: list[list[InlineKeyboardButton]] = []
     navigation_buttons: list[InlineKeyboardButton] = []
+    search_buttons = [InlineKeyboardButton('🔍 Поиск', callback_data='channel_search_posts')]
     action_buttons: list[InlineKeyboardButton] = []
 
 
@@ -81,22 +134,26 @@ async def posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
             InlineKeyboardButton('Скачать список постов', callback_data='posts_download')
         )
 
+    if search_text:
+        search_buttons.append(
+            InlineKeyboardButton('✖️ Сбросить поиск', callback_data='channel_search_clear_posts')
+        )
+
     keyboard.append(navigation_buttons)
+    keyboard.append(search_buttons)
     keyboard.append(action_buttons)
 
     reply_markup = InlineKeyboardMarkup(keyboard)
+    text = f'Выберите каналы для получения статистики: Всего каналов - {db_channels_count}'
+
+    if search_text:
+        text += f'\nПоиск: «{search_text}»'
 
     if message:
-        await message.reply_text(
-            f'Выберите каналы для получения статистики: Всего каналов - {db_channels_count}',
-            reply_markup=reply_markup,
-        )
+        await message.reply_text(text, reply_markup=reply_markup)
 
     elif query:
-        await query.edit_message_text(
-            f'Выберите каналы для получения статистики: Всего каналов - {db_channels_count}',
-            reply_markup=reply_markup,
-        )
+        await query.edit_message_text(text, reply_markup=reply_markup)
         await query.answer()
 
     else:
@@ -128,6 +185,20 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if data == 'posts_channels_all':
         logger.info(f'User {user.id} selected all channels')
 
+        search_text = context.user_data.get('posts_search')
+
+        if search_text:
+            # При активном поиске добавляем к выбору только найденные каналы
+            selected_channels = context.user_data.get('posts_selected_channels', [])
+            selected_channels += [
+                channel.channel_id
+                for channel in search_user_channels(user.id, search_text)
+                if channel.channel_id not in selected_channels
+            ]
+            context.user_data['posts_selected_channels'] = selected_channels
+
+            return await posts(update, context)
+
         # Получаем только доступные пользователю каналы
         accessible_channels = [
             channel.channel_id for channel in get_user_channels(user.id)
@@ -155,10 +226,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_checked = channel_id in selected_channels
 
         if not is_checked:
-            logger.info(f'User {user.id} selected channel {channel_id}')
+            logger.info(f'User {user.id} selected channel {channel_id}', extra=SAMPLED)
             selected_channels.append(channel_id)
         else:
-            logger.info(f'User {user.id} unselected channel {channel_id}')
+            logger.info(f'User {user.id} unselected channel {channel_id}', extra=SAMPLED)
             selected_channels.remove(channel_id)
 
         context.user_data['posts_selected_channels'] = selected_channels
@@ -169,26 +240,37 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info(f'User {user.id} requested to download posts')
 
         selected_channels = context.user_data.get('posts_selected_channels', [])
+        since, until = context.user_data.get('posts_period', (None, None))
 
-        text = ''
+        total = count_posts(selected_channels, since, until)
 
-        msg = await context.bot.send_message(
-            chat_id=user.id, text=f'Скачиваю посты [0/{len(selected_channels)}]'
-        )
+        msg = await context.bot.send_message(chat_id=user.id, text=f'Скачиваю посты [0/{total}]')
 
-        for idx, channel_id in enumerate(selected_channels, start=1):
-            channel_posts = get_posts(channel_id)
-            await msg.edit_text(f'Скачиваю посты [{idx}/{len(selected_channels)}]')
+        progress = ProgressReporter(msg.edit_text, 'Скачиваю посты', total)
+        file_like_object = BytesIO()
+        file_like_object.name = 'posts.txt'
 
-            for post in channel_posts:
-                channel = await context.bot.get_chat(channel_id)
-                invite_link = channel.invite_link or ''
-                link = f'https://t.me/{invite_link.split('/')[-1]}'
+        # Посты всех выбранных каналов одним запросом, от новых к старым
+        written = [0]
+        stop = Event()
+        export = asyncio.ensure_future(
+            asyncio.to_thread(
+                write_posts, file_like_object, selected_channels, since, until, written, stop
+            )
+        )
 
-                text += f'{post.channel_name} [{link}]\n- Отправлен: {post.created_at.date()}\n- Текст поста: {post.post_text}\n\n'
+        try:
+            while not export.done():
+                await asyncio.wait({export}, timeout=settings.PROGRESS_UPDATE_INTERVAL)
+                await progress.update(written[0])
 
-        file_like_object = BytesIO(text.encode('utf-8'))
-        file_like_object.name = 'posts.txt'
+            export.result()
+        except asyncio.CancelledError:
+            # Поток сам не отменяется: просим его остановиться, чтобы закрыть транзакцию
+            stop.set()
+            raise
+
+        file_like_object.seek(0)
 
         await msg.delete()
         return await context.bot.send_document(chat_id=user.id, document=file_like_object)
@@ -0,0 +1,48 @@
+from io import BytesIO
+from logging import getLogger
+
+from telegram import BotCommand, Update
+from telegram.ext import CommandHandler, ContextTypes
+
+from database import get_user
+from database.profiling import reset_stats, top_queries
+from utils.functions import get_message_context, get_user_context
+
+logger = getLogger(__name__)
+
+
+# Отчёт по самым медленным запросам к БД (только для админов)
+async def db_report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+    message = await get_message_context(update, context)
+
+    logger.info(f'User {sender.id} requested database report')
+
+    user = get_user(sender.id)
+
+    if not user or user.role != 'admin':
+        return await message.reply_text('Ошибка: у вас недостаточно прав для выполнения этой команды.')
+
+    if context.args and context.args[0] == 'reset':
+        reset_stats()
+        return await message.reply_text('Статистика запросов сброшена.')
+
+    try:
+        limit = int(context.args[0]) if context.args else 10
+    except ValueError:
+        return await message.reply_text('Использование: /db_report [количество запросов | reset]')
+
+    text = top_queries(limit)
+
+    if not text:
+        return await message.reply_text('Статистика запросов пока пуста.')
+
+    file_like_object = BytesIO(text.encode('utf-8'))
+    file_like_object.name = 'db_report.txt'
+
+    return await message.reply_document(document=file_like_object)
+
+
+# Обработчик команды
+handler = CommandHandler('db_report', db_report_command)
+command = (BotCommand('db_report', 'Отчёт по запросам к БД (только для админов)'), handler)
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from logging import getLogger
+
+from telegram import BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import CommandHandler, ContextTypes
+
+from database import get_user, search_broadcasts
+from utils.functions import get_callback_query_context, get_message_context, get_user_context
+
+logger = getLogger(__name__)
+
+RESULTS_PER_PAGE = 10
+DATE_FORMAT = '%Y-%m-%d'
+USAGE = (
+    'Использование: /search слова [с:ГГГГ-ММ-ДД] [по:ГГГГ-ММ-ДД]\n'
+    'Поиск идёт по каналам, выбранным в /posts, или по всем вашим каналам.'
+)
+
+
+def parse_search_args(args: list[str]) -> tuple[str, datetime | None, datetime | None]:
+    words = []
+    since = None
+    until = None
+
+    for arg in args:
+        key, _, value = arg.partition(':')
+
+        if key.lower() in ('с', 'c', 'from') and value:
+            since = datetime.strptime(value, DATE_FORMAT)
+        elif key.lower() in ('по', 'to') and value:
+            until = datetime.strptime(value, DATE_FORMAT) + timedelta(days=1)
+        else:
+            words.append(arg)
+
+    return ' '.join(words), since, until
+
+
+async def show_results(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+
+    if not isinstance(context.user_data, dict):
+        raise Exception('User data can not be fetched')
+
+    search = context.user_data.get('search', {})
+    page = max(search.get('page', 0), 0)
+
+    # Берём на один результат больше, чтобы понять, есть ли следующая страница
+    broadcasts = search_broadcasts(
+        sender.id,
+        search['text'],
+        channel_ids=search['channel_ids'],
+        since=search['since'],
+        until=search['until'],
+        limit=RESULTS_PER_PAGE + 1,
+        offset=page * RESULTS_PER_PAGE,
+    )
+
+    text = f'Результаты поиска «{search["text"]}» [Страница: {page + 1}]\n\n'
+
+    if not broadcasts:
+        text += 'Ничего не найдено.'
+
+    for broadcast in broadcasts[:RESULTS_PER_PAGE]:
+        channels = ', '.join(broadcast.channel_names[:5])
+
+        if len(broadcast.channel_names) > 5:
+            channels += f' и ещё {len(broadcast.channel_names) - 5}'
+
+        text += (
+            f'#{broadcast.id} от {broadcast.created_at:%d.%m.%Y}\n'
+            f'- Каналы: {channels}\n'
+            f'- {broadcast.headline or broadcast.post_text}\n\n'
+        )
+
+    navigation_buttons = []
+
+    if page > 0:
+        navigation_buttons.append(
+            InlineKeyboardButton('⬅️ Предыдущая', callback_data='search_prev_page')
+        )
+
+    if len(broadcasts) > RESULTS_PER_PAGE:
+        navigation_buttons.append(
+            InlineKeyboardButton('Следующая ➡️', callback_data='search_next_page')
+        )
+
+    reply_markup = InlineKeyboardMarkup([navigation_buttons])
+
+    if update.callback_query:
+        await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
+        return await update.callback_query.answer()
+
+    message = await get_message_context(update, context)
+    return await message.reply_text(text, reply_markup=reply_markup)
+
+
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+    message = await get_message_context(update, context)
+
+    user = get_user(sender.id)
+
+    if not user or user.role == 'user':
+        return await message.reply_text('У вас нет доступа к данному боту. Для доступа обратитесь к @Prosto_Durachok')
+
+    if not isinstance(context.user_data, dict):
+        raise Exception('User data can not be fetched')
+
+    try:
+        text, since, until = parse_search_args(context.args or [])
+    except ValueError:
+        return await message.reply_text(USAGE)
+
+    if not text:
+        return await message.reply_text(USAGE)
+
+    logger.info(f'User {sender.id} is searching posts')
+
+    context.user_data['search'] = {
+        'text': text,
+        'since': since,
+        'until': until,
+        'channel_ids': list(context.user_data.get('posts_selected_channels', [])),
+        'page': 0,
+    }
+
+    return await show_results(update, context)
+
+
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = await get_callback_query_context(update, context)
+
+    if not isinstance(context.user_data, dict):
+        raise Exception('User data can not be fetched')
+
+    data = query.data
+    search = context.user_data.get('search')
+
+    if data not in ('search_next_page', 'search_prev_page'):
+        return
+
+    if not search:
+        return await query.answer('Поиск устарел, повторите команду /search.')
+
+    search['page'] = search.get('page', 0) + (1 if data == 'search_next_page' else -1)
+
+    return await show_results(update, context)
+
+
+handler = CommandHandler('search', search)
+command = (BotCommand('search', 'Поиск по отправленным постам'), handler)
@@ -0,0 +1,77 @@
+from logging import getLogger
+
+from telegram import BotCommand, Update
+from telegram.ext import CommandHandler, ContextTypes
+
+from database import get_channel, get_user, get_user_targets, set_template
+from utils.functions import get_message_context, get_user_context
+from utils.templates import validate_template
+
+logger = getLogger(__name__)
+
+PARTS = {
+    'header': 'Шапка',
+    'footer': 'Подпись',
+}
+USAGE = (
+    'Использование: /template channel|group ID header|footer [текст | off]\n'
+    'В тексте можно использовать {name} и {link} — название и ссылку канала. '
+    'Без текста возвращается шаблон по умолчанию, off убирает шапку или подпись.\n'
+    'ID канала или группы можно получить через inline-поиск.'
+)
+
+
+async def template(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    sender = await get_user_context(update, context)
+    message = await get_message_context(update, context)
+
+    user = get_user(sender.id)
+
+    if not user or user.role == 'user':
+        return await message.reply_text('У вас нет доступа к данному боту. Для доступа обратитесь к @Prosto_Durachok')
+
+    # Текст шаблона берём из сообщения целиком, чтобы сохранить переносы строк
+    args = (message.text or '').split(maxsplit=4)
+
+    if (
+        len(args) < 4
+        or args[1] not in ('channel', 'group')
+        or not args[2].lstrip('-').isdigit()
+        or args[3] not in PARTS
+    ):
+        return await message.reply_text(USAGE)
+
+    kind, target_id, part = args[1], int(args[2]), args[3]
+    text = args[4].strip() if len(args) > 4 else None
+
+    if kind == 'channel':
+        channel = get_channel(target_id)
+
+        if not channel or (channel.user_id != sender.id and user.role != 'admin'):
+            return await message.reply_text('Канал не найден')
+
+    else:
+        user_groups = {
+            group_id for target_kind, group_id, _ in get_user_targets(sender.id) if target_kind == 'group'
+        }
+
+        if target_id not in user_groups:
+            return await message.reply_text('Группа не найдена')
+
+    if text == 'off':
+        text = ''
+
+    if text and not validate_template(text):
+        return await message.reply_text('В шаблоне можно использовать только {name} и {link}.')
+
+    set_template(kind, target_id, part, text)  # type: ignore
+    logger.info(f'User {sender.id} changed {part} template of {kind} {target_id}')
+
+    if text is None:
+        return await message.reply_text(f'{PARTS[part]} сброшена на шаблон по умолчанию.')
+
+    return await message.reply_text(f'{PARTS[part]} сохранена.')
+
+
+handler = CommandHandler('template', template)
+command = (BotCommand('template', 'Шапка и подпись постов канала или группы'), handler)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +13,92 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER_PASSWORD: str
     DB_PORT: int
+    DB_SLOW_QUERY_MS: int = 200
+    DB_EXPLAIN_SAMPLE_RATE: float = 0.1
+    DB_MIGRATE_ON_STARTUP: bool = True
+
+    # Posts log (POSTS_RETENTION_MONTHS=0 keeps posts forever)
+    POSTS_RETENTION_MONTHS: int = 0
+    POSTS_ARCHIVE_DIR: str = 'archive'
+    POSTS_PARTITIONS_AHEAD: int = 3
+    POSTS_MAINTENANCE_INTERVAL: int = 6 * 60 * 60
+
+    # Extra bot tokens for broadcasts as a JSON list; the main TOKEN still owns the UI
+    EXTRA_BOT_TOKENS: list[str] = []
+
+    # HTTP transport for Bot API calls (HTTP_VERSION=2 needs the http2 extra of python-telegram-bot)
+    HTTP_POOL_SIZE: int = 256
+    HTTP_UPDATES_POOL_SIZE: int = 1
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 5.0
+    HTTP_WRITE_TIMEOUT: float = 5.0
+    HTTP_MEDIA_WRITE_TIMEOUT: float = 20.0
+    HTTP_POOL_TIMEOUT: float = 1.0
+    HTTP_VERSION: Literal['1.1', '2'] = '1.1'
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Bot API rate limits (requests per second); interactive replies always keep their reserve
+    RATE_LIMIT_OVERALL: float = 30
+    RATE_LIMIT_INTERACTIVE_RESERVED: float = 5
+    RATE_LIMIT_BACKGROUND: float = 5
+    RATE_LIMIT_MAX_RETRIES: int = 0
+
+    # Editing and deleting a sent broadcast: channels processed in parallel
+    BROADCAST_EDIT_CONCURRENCY: int = 10
+
+    # Bulk channel import
+    CHANNEL_IMPORT_CONCURRENCY: int = 10
+    CHANNEL_IMPORT_MAX_ROWS: int = 1000
+
+    # Channel health monitor (CHANNEL_HEALTH_INTERVAL=0 disables the checks)
+    CHANNEL_HEALTH_INTERVAL: int = 6 * 60 * 60
+    CHANNEL_HEALTH_BATCH_SIZE: int = 20
+    CHANNEL_HEALTH_BATCH_DELAY: float = 1.0
+
+    # Background tasks (album delivery); on shutdown they get TASKS_SHUTDOWN_TIMEOUT seconds to finish
+    TASKS_LIMIT: int = 100
+    TASKS_SHUTDOWN_TIMEOUT: float = 30.0
+
+    # user_data cleanup (seconds since the user's last update); USER_DATA_TTLS maps key patterns to TTLs
+    USER_DATA_SWEEP_INTERVAL: int = 10 * 60
+    USER_DATA_IDLE_TTL: int = 7 * 24 * 60 * 60
+    USER_DATA_MEDIA_GROUP_TTL: int = 60 * 60
+    USER_DATA_TTLS: dict[str, int] = {
+        '*_page': 60 * 60,
+        '*search*': 60 * 60,
+        '*is_*': 6 * 60 * 60,
+        'will_send_at': 6 * 60 * 60,
+        'group_name': 60 * 60,
+        'group_change_name': 60 * 60,
+        '*selected*': 24 * 60 * 60,
+        'group_add_channels': 24 * 60 * 60,
+        'posts_period': 24 * 60 * 60,
+    }
+
+    # Progress messages of long operations: at most one edit per interval (seconds)
+    PROGRESS_UPDATE_INTERVAL: float = 3.0
+
+    # Caches (seconds)
+    CHANNEL_SEARCH_CACHE_TTL: int = 60
+    INLINE_TARGETS_CACHE_TTL: int = 300
+    INLINE_CACHE_TIME: int = 30
+    GROUP_CHANNELS_CACHE_TTL: int = 600
+    CHANNEL_TEMPLATES_CACHE_TTL: int = 3600
+
+    # Default post templates ({name} and {link} are the channel's); /template overrides them per channel or group
+    POST_HEADER_TEMPLATE: str = ''
+    POST_FOOTER_TEMPLATE: str = 'Подписывайтесь на канал - [{name}]({link})'
+    POST_FORWARD_TEMPLATE: str = '📣 Переслано из канала - [{name}]({link})'
+
+    # Logging (LOG_FORMAT=json for production, LOG_LEVELS='{"commands.groups": "WARNING"}')
+    LOG_LEVEL: str = 'INFO'
+    LOG_FORMAT: Literal['rich', 'json'] = 'rich'
+    LOG_LEVELS: dict[str, str] = {'httpx': 'WARNING'}
+    LOG_SAMPLE_RATE: float = 1.0
+
+    # Metrics (METRICS_PORT=0 disables the endpoint)
+    METRICS_HOST: str = '127.0.0.1'
+    METRICS_PORT: int = 9090
 
     class Config:
         env_file = '.env'
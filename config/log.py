@@ -1,17 +1,78 @@
+import atexit
+import json
 import logging
+import random
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 
 from rich.logging import RichHandler
 
+from config.environment import settings
+
+# Пометка для частых событий (переключение каналов, страницы, отправка в каждый канал):
+# такие записи пишутся только с вероятностью LOG_SAMPLE_RATE
+SAMPLED = {'sampled': True}
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sampled', False) or record.levelno > logging.INFO:
+            return True
+
+        return random.random() < self.rate
+
+
+class LocalQueueHandler(QueueHandler):
+    """Очередь внутри процесса: запись не нужно сериализовать, traceback оставляем обработчику."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(data, ensure_ascii=False)
+
 
 def configure_logging():
     DATE_FORMAT = '[%d.%m %H:%M:%S]'
     LOGGER_FORMAT = '%(asctime)s %(message)s'
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format=LOGGER_FORMAT,
-        datefmt=DATE_FORMAT,
-        handlers=[RichHandler(show_time=False, rich_tracebacks=True)],
-    )
+    if settings.LOG_FORMAT == 'json':
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler = RichHandler(show_time=False, rich_tracebacks=True)
+        handler.setFormatter(logging.Formatter(LOGGER_FORMAT, DATE_FORMAT))
+
+    # Вывод (и форматирование rich) идёт в отдельном потоке, обработчики только кладут запись в очередь
+    queue = SimpleQueue()
+    queue_handler = LocalQueueHandler(queue)
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+
+    listener = QueueListener(queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logging.basicConfig(level=settings.LOG_LEVEL, handlers=[queue_handler], force=True)
 
-    logging.getLogger('httpx').setLevel(logging.WARNING)
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
@@ -0,0 +1,97 @@
+from functools import wraps
+from logging import getLogger
+from time import perf_counter
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from config.environment import settings
+
+logger = getLogger(__name__)
+
+HANDLER_LATENCY = Histogram(
+    'bot_handler_duration_seconds',
+    'Time spent processing an update in a handler',
+    ['handler'],
+)
+BOT_API_LATENCY = Histogram(
+    'bot_api_request_duration_seconds',
+    'Bot API request latency',
+    ['method'],
+)
+BOT_API_RESPONSES = Counter(
+    'bot_api_responses_total',
+    'Bot API responses by HTTP status code',
+    ['method', 'code'],
+)
+DB_QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds',
+    'Database query latency by calling function',
+    ['query'],
+)
+BROADCASTS_IN_FLIGHT = Gauge(
+    'bot_broadcasts_in_flight',
+    'Broadcasts that are currently being sent',
+)
+MEDIA_GROUPS_PENDING = Gauge(
+    'bot_media_groups_pending',
+    'Media groups waiting to be collected and sent',
+)
+BACKGROUND_TASKS = Gauge(
+    'bot_background_tasks',
+    'Background tasks tracked by the task supervisor',
+)
+USER_DATA_ENTRIES = Gauge(
+    'bot_user_data_entries',
+    'Size of user_data: users, keys across all users and pending media groups',
+    ['kind'],
+)
+RATE_LIMIT_WAIT = Histogram(
+    'bot_rate_limit_wait_seconds',
+    'Time a Bot API request waited in the rate limiter',
+    ['lane'],
+)
+RATE_LIMIT_QUEUED = Gauge(
+    'bot_rate_limit_queued',
+    'Bot API requests waiting in the rate limiter',
+    ['lane'],
+)
+
+
+def track_handler(callback):
+    name = f'{callback.__module__}.{callback.__qualname__}'
+    histogram = HANDLER_LATENCY.labels(name)
+
+    @wraps(callback)
+    async def wrapper(*args, **kwargs):
+        started = perf_counter()
+
+        try:
+            return await callback(*args, **kwargs)
+        finally:
+            histogram.observe(perf_counter() - started)
+
+    return wrapper
+
+
+def track_in_progress(gauge: Gauge):
+    def decorator(callback):
+        @wraps(callback)
+        async def wrapper(*args, **kwargs):
+            gauge.inc()
+
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                gauge.dec()
+
+        return wrapper
+
+    return decorator
+
+
+def start_metrics_server():
+    if not settings.METRICS_PORT:
+        return
+
+    start_http_server(settings.METRICS_PORT, addr=settings.METRICS_HOST)
+    logger.info(f'Metrics are exposed on {settings.METRICS_HOST}:{settings.METRICS_PORT}')
@@ -1,13 +1,28 @@
+import sys
+from collections.abc import Callable, Iterator
 from datetime import datetime
 from logging import getLogger
-from typing import Literal
+from time import perf_counter
+from typing import Any, Literal, NamedTuple
 
 from psycopg import connect
 from psycopg.errors import OperationalError, ProgrammingError
+from psycopg.rows import tuple_row
+from psycopg.types.json import Jsonb
 from pydantic import PositiveInt
 
 from config.environment import settings
-from database.schemas import ChannelModel, GroupModel, PostModel, UserModel
+from config.metrics import DB_QUERY_LATENCY
+from database.schemas import (
+    BroadcastRow,
+    ChannelRow,
+    ChannelTemplateRow,
+    DeliveryRow,
+    GroupRow,
+    PostRow,
+    UserModel,
+)
+from utils.cache import TTLCache
 
 conninfo: dict[str, str | int] = {
     'dbname': settings.DB_NAME,
@@ -16,18 +31,81 @@ conninfo: dict[str, str | int] = {
     'host': settings.DB_HOST,
     'port': settings.DB_PORT,
 }
+dsn = ' '.join([f'{key}={value}' for key, value in conninfo.items()])
 
 logger = getLogger(__name__)
 
+# Порядок колонок совпадает с полями ChannelRow
+CHANNEL_COLUMNS = 'id, user_id, channel_id, channel_name, channel_link'
+
+# (user_id, строка поиска) -> найденные каналы; сбрасывается при любом изменении каналов
+channel_search_cache = TTLCache(ttl=settings.CHANNEL_SEARCH_CACHE_TTL, maxsize=256)
+# user_id -> все каналы и группы пользователя для inline-выбора
+user_targets_cache = TTLCache(ttl=settings.INLINE_TARGETS_CACHE_TTL, maxsize=256)
+# group_id -> отсортированный кортеж id каналов группы
+group_channels_cache = TTLCache(ttl=settings.GROUP_CHANNELS_CACHE_TTL, maxsize=4096)
+# channel_id -> готовые шапка и подпись канала (заполняет utils.templates)
+channel_templates_cache = TTLCache(ttl=settings.CHANNEL_TEMPLATES_CACHE_TTL, maxsize=4096)
+
+
+def invalidate_channel_caches():
+    channel_search_cache.invalidate()
+    user_targets_cache.invalidate()
+    # Группы показывают только существующие каналы
+    group_channels_cache.invalidate()
+    channel_templates_cache.invalidate()
+
+
+class QueryEvent(NamedTuple):
+    query: str
+    params: Any
+    duration: float
+    rows: int | None
+    caller: str
+
+
+def observe_query_latency(event: QueryEvent):
+    DB_QUERY_LATENCY.labels(event.caller).observe(event.duration)
+
+
+query_hooks: list[Callable[[QueryEvent], None]] = [observe_query_latency]
+
+
+def add_query_hook(hook: Callable[[QueryEvent], None]):
+    """Зарегистрировать функцию, которая вызывается после каждого запроса."""
+    query_hooks.append(hook)
 
-def execute(query: str, fetch: Literal['one', 'all'] = 'all', retries: int = 3, params = None):
-    connection = connect(
-        ' '.join([f'{key}={value}' for key, value in conninfo.items()]), autocommit=True
-    )
+
+def run_query_hooks(event: QueryEvent):
+    for hook in query_hooks:
+        try:
+            hook(event)
+        except Exception as e:
+            logger.error(f'Query hook {hook.__name__} failed: {e}')
+
+
+def row_type(cls: type[tuple]):
+    """Фабрика строк psycopg, которая собирает NamedTuple прямо из значений курсора."""
+    return lambda cursor: cls._make  # type: ignore
+
+
+def execute(
+    query: str,
+    fetch: Literal['one', 'all'] = 'all',
+    retries: int = 3,
+    params = None,
+    row_factory = None,
+):
+    caller = sys._getframe(1).f_code.co_name
+    started = perf_counter()
+    rows = None
+
+    connection = connect(dsn, autocommit=True)
 
     try:
-        with connection.cursor() as cur:
+        with connection.cursor(row_factory=row_factory or tuple_row) as cur:
             cur.execute(query, params)  # type: ignore
+            rows = cur.rowcount
 
             try:
                 if fetch == 'one':
@@ -41,7 +119,11 @@ def execute(query: str, fetch: Literal['one', 'all'] = 'all', retries: int = 3,
         if retries == 0:
             raise
 
-        return execute(query, params, fetch, retries - 1)
+        return execute(query, fetch, retries - 1, params, row_factory)
+
+    finally:
+        connection.close()
+        run_query_hooks(QueryEvent(query, params, perf_counter() - started, rows, caller))
 
 
 def get_user(user_id: PositiveInt):
@@ -121,68 +203,65 @@ def delete_user(user_id: int):
 
 
 
-def get_total_channels():
-    count = execute('SELECT COUNT(*) FROM user_chanels', fetch='one')
+def get_counter(
+    scope: Literal['channels', 'user_channels', 'user_groups', 'group_channels'], key: int = 0
+) -> int:
+    """Значение счётчика из таблицы counters, которую поддерживают триггеры."""
+    count = execute(
+        'SELECT value FROM counters WHERE scope = %s AND key = %s',
+        fetch='one',
+        params=(scope, key),
+    )
 
-    if not isinstance(count, tuple):
-        raise Exception('Count can not be fetched')
+    return int(count[0]) if count else 0
 
-    return int(count[0])
+
+def get_total_channels():
+    return get_counter('channels')
 
 
 def get_channel(channel_id: int):
     channel = execute(
-        f'SELECT * FROM user_chanels WHERE channel_id = {channel_id}',
+        f'SELECT {CHANNEL_COLUMNS} FROM user_chanels WHERE channel_id = {channel_id}',
         fetch='one',
+        row_factory=row_type(ChannelRow),
     )
 
     if not channel:
         return False
 
-    return ChannelModel.model_validate(
-        {
-            'id': channel[0],
-            'user_id': channel[1],
-            'channel_id': channel[2],
-            'channel_name': channel[3],
-            'channel_link': channel[4],
-        }
+    return channel
+
+def get_channels_by_ids(channel_ids: list[int]) -> dict[int, ChannelRow]:
+    channels = execute(
+        f'SELECT {CHANNEL_COLUMNS} FROM user_chanels WHERE channel_id = ANY(%s)',
+        params=(channel_ids,),
+        row_factory=row_type(ChannelRow),
     )
 
+    return {channel.channel_id: channel for channel in channels or []}
+
+
 def get_user_channels(user_id: int, limit: int = 20, offset: int = 0):
-    query = """
-        SELECT channel_id, channel_name, channel_link 
+    query = f"""
+        SELECT {CHANNEL_COLUMNS}
         FROM user_chanels 
         WHERE user_id = %s
         LIMIT %s OFFSET %s
     """
-    channels = execute(query, fetch='all', params=(user_id, limit, offset))
+    channels = execute(
+        query, fetch='all', params=(user_id, limit, offset), row_factory=row_type(ChannelRow)
+    )
 
     # Проверяем результат запроса
     if not channels:
         return []  # Возвращаем пустой список, если нет каналов
 
-    # Добавляем проверку на наличие нужных данных в каждом канале
-    return [
-        ChannelModel.model_validate({
-            'id': None,  # Нет id в запросе
-            'user_id': user_id,
-            'channel_id': ch[0],
-            'channel_name': ch[1],
-            'channel_link': ch[2],
-        })
-        for ch in channels if len(ch) == 3  # Проверяем, что в кортежах 3 элемента
-    ]
+    return channels
 
 
 def get_total_user_channels(user_id: int):
-    query = "SELECT COUNT(*) FROM user_chanels WHERE user_id = %s"
-    count = execute(query, fetch='one', params=(user_id,))  # Ensure the user_id is passed as a tuple
-    
-    if not count:
-        raise Exception('Count cannot be fetched')
-
-    return int(count[0])
+    return get_counter('user_channels', user_id)
 
 
 
@@ -192,10 +271,234 @@ def save_channel(user_id: int, channel_id: int, channel_name: str, channel_link:
     execute(
         f"""INSERT INTO user_chanels (user_id, channel_id, channel_name, channel_link) VALUES ({user_id}, {channel_id}, '{channel_name}', '{channel_link}')"""
     )
+    invalidate_channel_caches()
+
+
+def save_channels(user_id: int, channels: list[tuple[int, str, str]]) -> list[int]:
+    """Добавить пачку каналов `(channel_id, название, ссылка)` одним запросом, вернуть id добавленных."""
+    if not channels:
+        return []
+
+    channel_ids, channel_names, channel_links = (
+        list(column) for column in zip(*channels, strict=True)
+    )
+
+    saved = execute(
+        """
+        INSERT INTO user_chanels (user_id, channel_id, channel_name, channel_link)
+        SELECT %s, channel_id, channel_name, channel_link
+        FROM unnest(%s::bigint[], %s::text[], %s::text[]) AS c(channel_id, channel_name, channel_link)
+        ON CONFLICT (channel_id) DO NOTHING
+        RETURNING channel_id
+        """,
+        params=(user_id, channel_ids, channel_names, channel_links),
+    )
+    invalidate_channel_caches()
+
+    return [int(row[0]) for row in saved or []]
+
+
+def get_existing_channel_ids(channel_ids: list[int]) -> set[int]:
+    rows = execute(
+        'SELECT channel_id FROM user_chanels WHERE channel_id = ANY(%s)',
+        params=(channel_ids,),
+    )
+
+    return {int(row[0]) for row in rows or []}
+
+
+def update_channel_info(channel_id: int, channel_name: str, channel_link: str | None = None):
+    """Обновить название и, если известна, ссылку канала."""
+    execute(
+        """
+        UPDATE user_chanels
+        SET channel_name = %s, channel_link = coalesce(%s, channel_link)
+        WHERE channel_id = %s
+        """,
+        params=(channel_name, channel_link, channel_id),
+    )
+    invalidate_channel_caches()
+
+
+def get_channel_templates(channel_ids: list[int]) -> dict[int, ChannelTemplateRow]:
+    """Шаблоны каналов: свой шаблон канала, иначе шаблон первой группы, где он задан."""
+    rows = execute(
+        """
+        SELECT u.channel_id, u.channel_name, u.channel_link,
+            COALESCE(u.header_template, g.header_template),
+            COALESCE(u.footer_template, g.footer_template)
+        FROM user_chanels u
+        LEFT JOIN LATERAL (
+            SELECT ug.header_template, ug.footer_template
+            FROM group_channel gc JOIN user_group ug ON ug.id = gc.group_id
+            WHERE gc.channel_id = u.channel_id
+                AND (ug.header_template IS NOT NULL OR ug.footer_template IS NOT NULL)
+            ORDER BY ug.id
+            LIMIT 1
+        ) g ON true
+        WHERE u.channel_id = ANY(%s)
+        """,
+        params=(list(channel_ids),),
+        row_factory=row_type(ChannelTemplateRow),
+    )
+
+    if not isinstance(rows, list):
+        raise Exception('Channel templates can not be fetched')
+
+    return {row.channel_id: row for row in rows}
+
+
+def set_template(
+    kind: Literal['channel', 'group'],
+    target_id: int,
+    part: Literal['header', 'footer'],
+    template: str | None,
+):
+    """Задать шаблон шапки или подписи канала или группы, None возвращает шаблон по умолчанию."""
+    table, column = ('user_chanels', 'channel_id') if kind == 'channel' else ('user_group', 'id')
+    part_column = 'header_template' if part == 'header' else 'footer_template'
+
+    execute(
+        f'UPDATE {table} SET {part_column} = %s WHERE {column} = %s',
+        params=(template, target_id),
+    )
+    channel_templates_cache.invalidate()
+
+
+def get_channel_ids_after(channel_id: int | None, limit: int) -> list[int]:
+    """Следующая пачка id каналов по возрастанию для обхода всей таблицы без OFFSET."""
+    rows = execute(
+        """
+        SELECT channel_id FROM user_chanels
+        WHERE %(after)s::bigint IS NULL OR channel_id > %(after)s
+        ORDER BY channel_id
+        LIMIT %(limit)s
+        """,
+        params={'after': channel_id, 'limit': limit},
+    )
+
+    return [int(row[0]) for row in rows or []]
+
+
+def set_channels_health(statuses: list[tuple[int, str, bool]]):
+    """Сохранить результат проверки `(channel_id, статус бота, доступен ли канал)`."""
+    if not statuses:
+        return
+
+    channel_ids, bot_statuses, reachable = (
+        list(column) for column in zip(*statuses, strict=True)
+    )
+
+    execute(
+        """
+        UPDATE user_chanels c
+        SET bot_status = s.bot_status, is_reachable = s.is_reachable, status_checked_at = now()
+        FROM unnest(%s::bigint[], %s::text[], %s::boolean[]) AS s(channel_id, bot_status, is_reachable)
+        WHERE c.channel_id = s.channel_id
+        """,
+        params=(channel_ids, bot_statuses, reachable),
+    )
+
+
+def get_unreachable_channels(channel_ids: list[int]) -> dict[int, tuple[str, str | None]]:
+    """Каналы из списка, помеченные недоступными: channel_id -> (название, статус бота)."""
+    rows = execute(
+        """
+        SELECT channel_id, channel_name, bot_status FROM user_chanels
+        WHERE channel_id = ANY(%s) AND NOT is_reachable
+        """,
+        params=(channel_ids,),
+    )
+
+    return {int(row[0]): (row[1], row[2]) for row in rows or []}
+
+
+def set_channel_bots(bot_id: int, statuses: list[tuple[int, bool]]):
+    """Сохранить, в каких каналах бот из пула может публиковать: `(channel_id, может ли)`."""
+    if not statuses:
+        return
+
+    allowed = [channel_id for channel_id, is_allowed in statuses if is_allowed]
+    denied = [channel_id for channel_id, is_allowed in statuses if not is_allowed]
+
+    execute(
+        """
+        WITH deleted AS (
+            DELETE FROM channel_bots WHERE bot_id = %(bot_id)s AND channel_id = ANY(%(denied)s)
+        )
+        INSERT INTO channel_bots (channel_id, bot_id)
+        SELECT channel_id, %(bot_id)s FROM unnest(%(allowed)s::bigint[]) AS channel_id
+        ON CONFLICT (channel_id, bot_id) DO UPDATE SET checked_at = now()
+        """,
+        params={'bot_id': bot_id, 'allowed': allowed, 'denied': denied},
+    )
+
+
+def get_channel_bots(channel_ids: list[int]) -> dict[int, set[int]]:
+    """Боты из пула, которые могут публиковать в каналах: channel_id -> {bot_id}."""
+    rows = execute(
+        'SELECT channel_id, bot_id FROM channel_bots WHERE channel_id = ANY(%s)',
+        params=(channel_ids,),
+    )
+    channel_bots: dict[int, set[int]] = {}
+
+    for channel_id, bot_id in rows or []:
+        channel_bots.setdefault(int(channel_id), set()).add(int(bot_id))
+
+    return channel_bots
 
 
 def delete_channel(channel_id: int):
     execute(f'DELETE FROM user_chanels WHERE channel_id = {channel_id}')
+    invalidate_channel_caches()
+
+
+def search_user_channels(user_id: int, text: str, limit: int = 500):
+    """Каналы пользователя, в названии которых есть `text` (без учёта регистра)."""
+    text = text.strip().lower()
+
+    def search():
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        channels = execute(
+            f"""
+            SELECT {CHANNEL_COLUMNS}
+            FROM user_chanels
+            WHERE user_id = %s AND channel_name ILIKE %s
+            ORDER BY channel_name ASC
+            LIMIT %s
+            """,
+            params=(user_id, pattern, limit),
+            row_factory=row_type(ChannelRow),
+        )
+
+        if not isinstance(channels, list):
+            raise Exception('Channels can not be fetched')
+
+        return channels
+
+    return channel_search_cache.get_or_set((user_id, text), search)
+
+
+def get_user_targets(user_id: int) -> list[tuple[str, int, str]]:
+    """Все каналы и группы пользователя одним запросом: `(вид, id, название)`."""
+
+    def fetch():
+        targets = execute(
+            """
+            SELECT 'channel', channel_id, channel_name FROM user_chanels WHERE user_id = %(user_id)s
+            UNION ALL
+            SELECT 'group', id, group_name FROM user_group WHERE user_id = %(user_id)s
+            ORDER BY 3
+            """,
+            params={'user_id': user_id},
+        )
+
+        if not isinstance(targets, list):
+            raise Exception('Targets can not be fetched')
+
+        return [(kind, int(target_id), name) for kind, target_id, name in targets]
+
+    return user_targets_cache.get_or_set(user_id, fetch)
 
 
 def get_channels(limit: int, offset: int = 0):
@@ -203,25 +506,15 @@ def get_channels(limit: int, offset: int = 0):
         limit = get_total_channels()
 
     channels = execute(
-        f'SELECT * FROM user_chanels c ORDER BY c.channel_name ASC LIMIT {limit} OFFSET {offset}',
+        f'SELECT {CHANNEL_COLUMNS} FROM user_chanels c ORDER BY c.channel_name ASC LIMIT {limit} OFFSET {offset}',
         fetch='all',
+        row_factory=row_type(ChannelRow),
     )
 
     if not isinstance(channels, list):
         raise Exception('Channels can not be fetched')
 
-    return [
-        ChannelModel.model_validate(
-            {
-                'id': channel[0],
-                'user_id': channel[1],
-                'channel_id': channel[2],
-                'channel_name': channel[3],
-                'channel_link': channel[4],
-            }
-        )
-        for channel in channels
-    ]
+    return channels
 
 def get_channels_by_user(user_id: int, limit: int = 10, offset: int = 0):
     """
@@ -237,8 +530,8 @@ def get_channels_by_user(user_id: int, limit: int = 10, offset: int = 0):
         limit = get_total_channels_by_user(user_id)
 
     # Запрос для получения всех доступных каналов пользователя с пагинацией
-    query = """
-        SELECT c.channel_id, c.channel_name, c.channel_link 
+    query = f"""
+        SELECT {CHANNEL_COLUMNS}
         FROM user_chanels c
         WHERE uc.user_id = %s
         ORDER BY c.channel_name ASC
@@ -246,20 +539,13 @@ def get_channels_by_user(user_id: int, limit: int = 10, offset: int = 0):
     """
     
     # Выполняем запрос, чтобы получить каналы пользователя
-    channels = execute(query, fetch='all', params=(user_id, limit, offset))
+    channels = execute(
+        query, fetch='all', params=(user_id, limit, offset), row_factory=row_type(ChannelRow)
+    )
 
     # Если каналы найдены, возвращаем их как список объектов
     if channels:
-        return [
-            ChannelModel.model_validate({
-                'id': None,  # ID может быть None, если не используется
-                'user_id': user_id,
-                'channel_id': ch[0],
-                'channel_name': ch[1],
-                'channel_link': ch[2],
-            })
-            for ch in channels
-        ]
+        return channels
     else:
         return []  # Возвращаем пустой список, если каналы не найдены
 
@@ -269,24 +555,15 @@ def delete_group_if_no_channels(group_id: int):
     """Функция для удаления группы, если в ней нет каналов."""
     query = "DELETE FROM user_group WHERE id = %s"
     execute(query, params=(group_id,))
+    user_targets_cache.invalidate()
+    group_channels_cache.invalidate(lambda key: key == group_id)
+    # Каналы группы могли наследовать её шаблон
+    channel_templates_cache.invalidate()
     logger.info(f'Группа с ID {group_id} удалена, так как не содержит каналов.')
 
 
 def get_total_groups(user_id: int):
-    count = execute(
-        f'''
-        SELECT COUNT(DISTINCT user_group.group_id)
-        FROM user_group
-        JOIN group_channel ON user_group.group_id = group_channel.group_id
-        WHERE user_group.user_id = {user_id}
-        ''', fetch='one'
-    )
-
-    if not isinstance(count, tuple):
-        raise Exception('Count can not be fetched')
-
-    return int(count[0])
-
+    return get_counter('user_groups', user_id)
 
 
 def get_channels_by_group_id(group_id: int):
@@ -305,23 +582,14 @@ def get_group(user_id: int, limit: int, offset: int = 0):
         limit = get_total_groups(user_id)
 
     groups = execute(
-        f'SELECT * FROM user_group c WHERE c.user_id = {user_id} ORDER BY c.group_name ASC LIMIT {limit} OFFSET {offset}',
+        f'SELECT id, user_id, group_name, group_id FROM user_group c WHERE c.user_id = {user_id} ORDER BY c.group_name ASC LIMIT {limit} OFFSET {offset}',
+        row_factory=row_type(GroupRow),
     )
 
     if not isinstance(groups, list):
         raise Exception('Groups can not be fetched')
 
-    return [
-        GroupModel.model_validate(
-            {
-                'id': group[0],
-                'user_id': group[1],
-                'group_name': group[2],
-                'group_id': group[3],
-            }
-        )
-        for group in groups
-    ]
+    return groups
 
 
 
@@ -330,74 +598,68 @@ def get_groups(user_id: int, limit: int, offset: int = 0):
         limit = get_total_groups(user_id)
 
     groups = execute(
-        f'SELECT * FROM user_group c WHERE c.user_id = {user_id} ORDER BY c.group_name ASC LIMIT {limit} OFFSET {offset}',
+        f'SELECT id, user_id, group_name, group_id FROM user_group c WHERE c.user_id = {user_id} ORDER BY c.group_name ASC LIMIT {limit} OFFSET {offset}',
+        row_factory=row_type(GroupRow),
     )
 
     if not isinstance(groups, list):
         raise Exception('Groups can not be fetched')
 
-    return [
-        GroupModel.model_validate(
-            {
-                'id': group[0],
-                'user_id': group[1],
-                'group_name': group[2],
-                'group_id': group[3],
-            }
+    return groups
+
+
+def get_group_channel_ids(group_id: int) -> tuple[int, ...]:
+    """id каналов группы (только существующих), кэшируются до изменения группы или каналов."""
+
+    def fetch():
+        rows = execute(
+            """
+            SELECT g.channel_id FROM group_channel g
+            WHERE g.group_id = %s
+                AND EXISTS (SELECT 1 FROM user_chanels u WHERE u.channel_id = g.channel_id)
+            ORDER BY g.channel_id
+            """,
+            params=(group_id,),
         )
-        for group in groups
-    ]
 
+        if not isinstance(rows, list):
+            raise Exception('Channels can not be fetched')
 
-def get_channels_by_group(group_id: int, limit: int, offset: int = 0):
-    if limit == -1:
-        limit = get_total_channels_for_group(group_id)
+        return tuple(int(row[0]) for row in rows)
 
-    channels = execute(
-        f"""
-        SELECT u.id, u.user_id, u.channel_id, u.channel_name, u.channel_link
-        FROM user_chanels u
-        JOIN group_channel g ON u.channel_id = g.channel_id
-        WHERE g.group_id = {group_id}
-        ORDER BY u.channel_id ASC
-        LIMIT {limit} OFFSET {offset}
-        """,
-    )
+    return group_channels_cache.get_or_set(group_id, fetch)
 
-    if not isinstance(channels, list):
-        raise Exception('Channels can not be fetched')
 
-    return [
-        ChannelModel.model_validate(
-            {
-                'id': channel[0],
-                'user_id': channel[1],
-                'channel_id': channel[2],
-                'channel_name': channel[3],
-                'channel_link': channel[4],
-            }
-        )
-        for channel in channels
-    ]
+def get_channels_by_group(group_id: int, limit: int, offset: int = 0):
+    channel_ids = get_group_channel_ids(group_id)
+    page = list(channel_ids[offset:] if limit == -1 else channel_ids[offset : offset + limit])
+
+    if not page:
+        return []
 
+    channels = get_channels_by_ids(page)
 
-def get_total_channels_for_group(group_id: int):
-    count = execute(f'SELECT COUNT(*) FROM group_channel WHERE group_id = {group_id}', fetch='one')
+    return [channels[channel_id] for channel_id in page if channel_id in channels]
 
-    if not isinstance(count, tuple):
-        raise Exception('Count can not be fetched')
 
-    return int(count[0])
+def get_total_channels_for_group(group_id: int):
+    return get_counter('group_channels', group_id)
 
 
 def group_add_channels(group_id: int, channel_id: int):
     execute(
         f'INSERT INTO group_channel (group_id, channel_id) VALUES ({group_id}, {channel_id}) ON CONFLICT (group_id, channel_id) DO NOTHING'
     )
+    group_channels_cache.invalidate(lambda key: key == group_id)
+    # Каналы группы могли наследовать её шаблон
+    channel_templates_cache.invalidate()
 
 
 def group_delete_channels(group_id: int, channel_id: int):
     execute(f'DELETE FROM group_channel WHERE group_id = {group_id} AND channel_id = {channel_id}')
+    group_channels_cache.invalidate(lambda key: key == group_id)
+    # Каналы группы могли наследовать её шаблон
+    channel_templates_cache.invalidate()
 
 
 def new_group_channel_save(user_id: int, group_name: str, channel_ids: list[int]):
@@ -414,42 +676,267 @@ def new_group_channel_save(user_id: int, group_name: str, channel_ids: list[int]
     for channel_id in channel_ids:
         group_add_channels(group_id, channel_id)
 
+    user_targets_cache.invalidate(lambda key: key == user_id)
+
 
 def group_delete(group_id: int):
     execute(f'DELETE FROM user_group WHERE id = {group_id}')
     execute(f'DELETE FROM group_channel WHERE group_id = {group_id}')
+    user_targets_cache.invalidate()
+    group_channels_cache.invalidate(lambda key: key == group_id)
+    # Каналы группы могли наследовать её шаблон
+    channel_templates_cache.invalidate()
 
 
 def new_group_name(group_id: int, group_name: str, user_id: int):
     execute(
         f"""UPDATE user_group SET group_name = '{group_name}' WHERE id = {group_id} AND user_id = {user_id}"""
     )
+    user_targets_cache.invalidate(lambda key: key == user_id)
 
 
-def save_post(
-    channel_id: int, channel_name: str, post_id: int, post_text: str | None, user_id: int
+def save_broadcast(
+    user_id: int,
+    post_id: int,
+    post_text: str | None,
+    sent: dict[int, dict],
+    forward_header: str | None = None,
 ):
-    execute(
-        f"""INSERT INTO posts (channel_id, channel_name, post_id, post_text, user_id, created_at) VALUES ({channel_id}, '{channel_name}', {post_id}, '{post_text}', {user_id}, '{datetime.now().date()}')"""
+    """Записать рассылку один раз и по строке доставки на каждый канал.
+
+    `sent` — channel_id -> данные доставки, из них сохраняются `message_ids` и `bot_id`.
+    `forward_header` — строка «Переслано из канала», если пост переслан из другого канала.
+    """
+    if not sent:
+        return None
+
+    deliveries = [
+        {
+            'channel_id': channel_id,
+            'message_ids': delivery.get('message_ids'),
+            'bot_id': delivery.get('bot_id'),
+        }
+        for channel_id, delivery in sent.items()
+    ]
+
+    broadcast = execute(
+        """
+        WITH broadcast AS (
+            INSERT INTO broadcasts (user_id, post_id, post_text, forward_header)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id, created_at
+        )
+        INSERT INTO posts (broadcast_id, channel_id, created_at, message_ids, bot_id)
+        SELECT broadcast.id, d.channel_id, broadcast.created_at, d.message_ids, d.bot_id
+        FROM broadcast, jsonb_to_recordset(%s) AS d(channel_id bigint, message_ids bigint[], bot_id bigint)
+        RETURNING broadcast_id
+        """,
+        fetch='one',
+        params=(user_id, post_id, post_text, forward_header or None, Jsonb(deliveries)),
     )
 
+    if not isinstance(broadcast, tuple):
+        raise Exception('Broadcast ID can not be fetched')
+
+    return int(broadcast[0])
+
+
+def get_broadcast_user(broadcast_id: int) -> int | None:
+    row = execute('SELECT user_id FROM broadcasts WHERE id = %s', fetch='one', params=(broadcast_id,))
 
-def get_posts(channel_id: int):
-    posts = execute(
-        f"""SELECT (p.id, p.channel_id, p.channel_name, p.post_id, p.post_text, p.user_id, p.created_at) FROM posts p WHERE channel_id = '{channel_id}' ORDER BY created_at DESC""",
+    return int(row[0]) if row else None
+
+
+def get_broadcast_forward_header(broadcast_id: int) -> str:
+    row = execute(
+        'SELECT forward_header FROM broadcasts WHERE id = %s', fetch='one', params=(broadcast_id,)
     )
-    posts = [post[0] for post in posts]
 
-    return [
-        PostModel.model_validate(
-            {
-                'id': post[0],
-                'channel_id': post[1],
-                'channel_name': post[2],
-                'post_id': post[3],
-                'post_text': post[4],
-                'created_at': post[6],
-            }
-        )
-        for post in posts
+    return row[0] if row and row[0] else ''
+
+
+def get_deliveries(broadcast_id: int) -> list[DeliveryRow]:
+    rows = execute(
+        'SELECT channel_id, message_ids, bot_id FROM posts WHERE broadcast_id = %s ORDER BY channel_id',
+        params=(broadcast_id,),
+        row_factory=row_type(DeliveryRow),
+    )
+
+    if not isinstance(rows, list):
+        raise Exception('Deliveries can not be fetched')
+
+    return rows
+
+
+def update_broadcast_text(broadcast_id: int, post_text: str):
+    execute('UPDATE broadcasts SET post_text = %s WHERE id = %s', params=(post_text, broadcast_id))
+
+
+def delete_deliveries(broadcast_id: int, channel_ids: list[int]):
+    """Убрать доставки из журнала; рассылка без доставок удаляется целиком."""
+    execute(
+        'DELETE FROM posts WHERE broadcast_id = %s AND channel_id = ANY(%s)',
+        params=(broadcast_id, channel_ids),
+    )
+    execute(
+        'DELETE FROM broadcasts b WHERE b.id = %s '
+        'AND NOT EXISTS (SELECT 1 FROM posts p WHERE p.broadcast_id = b.id)',
+        params=(broadcast_id,),
+    )
+
+
+def posts_filter(
+    channel_ids: list[int], since: datetime | None, until: datetime | None
+) -> tuple[str, list]:
+    """Условие отбора доставок по каналам и периоду; с периодом читаются только его партиции."""
+    conditions = ['p.channel_id = ANY(%s)']
+    params: list = [list(channel_ids)]
+
+    if since:
+        conditions.append('p.created_at >= %s')
+        params.append(since)
+
+    if until:
+        conditions.append('p.created_at < %s')
+        params.append(until)
+
+    return ' AND '.join(conditions), params
+
+
+def count_posts(
+    channel_ids: list[int], since: datetime | None = None, until: datetime | None = None
+) -> int:
+    where, params = posts_filter(channel_ids, since, until)
+    row = execute(f'SELECT COUNT(*) FROM posts p WHERE {where}', fetch='one', params=params)
+
+    if not isinstance(row, tuple):
+        raise Exception('Posts can not be counted')
+
+    return int(row[0])
+
+
+def posts_query(
+    channel_ids: list[int],
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int | None = None,
+) -> tuple[str, list]:
+    """Запрос выгрузки постов для iter_posts; его же план проверяет `poe check-plans`."""
+    where, params = posts_filter(channel_ids, since, until)
+    query = f"""
+        SELECT p.id, p.channel_id, coalesce(c.channel_name, p.channel_id::text), c.channel_link,
+               b.post_id, coalesce(b.post_text, ''), p.created_at
+        FROM posts p
+        JOIN broadcasts b ON b.id = p.broadcast_id
+        LEFT JOIN LATERAL (
+            SELECT channel_name, channel_link FROM user_chanels
+            WHERE channel_id = p.channel_id LIMIT 1
+        ) c ON true
+        WHERE {where}
+        ORDER BY p.created_at DESC
+        """
+
+    if limit is not None:
+        query += ' LIMIT %s'
+        params.append(limit)
+
+    return query, params
+
+
+def iter_posts(
+    channel_ids: list[int],
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int | None = None,
+    batch_size: int = 1000,
+) -> Iterator[PostRow]:
+    """Посты нескольких каналов от новых к старым одним запросом.
+
+    Строки читаются серверным курсором пачками по `batch_size`, поэтому выгрузка
+    не держит всю историю в памяти.
+    """
+    if not channel_ids:
+        return
+
+    query, params = posts_query(channel_ids, since, until, limit)
+    started = perf_counter()
+    rows = 0
+
+    # Серверный курсор живёт только внутри транзакции
+    with (
+        connect(dsn) as connection,
+        connection.transaction(),
+        connection.cursor(name='iter_posts', row_factory=row_type(PostRow)) as cur,
+    ):
+        cur.itersize = batch_size
+        cur.execute(query, params)
+
+        for row in cur:
+            rows += 1
+            yield row
+
+    run_query_hooks(QueryEvent(query, params, perf_counter() - started, rows, 'iter_posts'))
+
+
+def search_broadcasts(
+    user_id: int,
+    text: str,
+    channel_ids: list[int] | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 10,
+    offset: int = 0,
+):
+    """Полнотекстовый поиск по рассылкам, попавшим в каналы пользователя."""
+    conditions = [
+        "b.search_vector @@ (websearch_to_tsquery('russian', %(text)s) || websearch_to_tsquery('english', %(text)s))",
+        """EXISTS (
+            SELECT 1 FROM posts p
+            JOIN user_chanels c ON c.channel_id = p.channel_id
+            WHERE p.broadcast_id = b.id AND c.user_id = %(user_id)s
+                AND (%(channel_ids)s::bigint[] IS NULL OR p.channel_id = ANY(%(channel_ids)s))
+        )""",
     ]
+
+    if since:
+        conditions.append('b.created_at >= %(since)s')
+
+    if until:
+        conditions.append('b.created_at < %(until)s')
+
+    broadcasts = execute(
+        f"""
+        SELECT b.id, coalesce(b.post_text, ''), b.created_at,
+               ts_headline(
+                   'russian', coalesce(b.post_text, ''),
+                   websearch_to_tsquery('russian', %(text)s) || websearch_to_tsquery('english', %(text)s),
+                   'StartSel=«, StopSel=», MaxWords=25, MinWords=10'
+               ),
+               -- Только каналы пользователя, как и в условии отбора: чужие названия не показываем
+               ARRAY(
+                   SELECT c.channel_name
+                   FROM posts p JOIN user_chanels c ON c.channel_id = p.channel_id
+                   WHERE p.broadcast_id = b.id AND c.user_id = %(user_id)s
+                       AND (%(channel_ids)s::bigint[] IS NULL OR p.channel_id = ANY(%(channel_ids)s))
+               )
+        FROM broadcasts b
+        WHERE {' AND '.join(conditions)}
+        ORDER BY b.created_at DESC
+        LIMIT %(limit)s OFFSET %(offset)s
+        """,
+        params={
+            'text': text,
+            'user_id': user_id,
+            'channel_ids': channel_ids or None,
+            'since': since,
+            'until': until,
+            'limit': limit,
+            'offset': offset,
+        },
+        row_factory=row_type(BroadcastRow),
+    )
+
+    if not isinstance(broadcasts, list):
+        raise Exception('Broadcasts can not be fetched')
+
+    return broadcasts
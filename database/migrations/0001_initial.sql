@@ -0,0 +1,39 @@
+-- Таблицы, с которыми бот работал до появления миграций.
+-- IF NOT EXISTS оставляет уже существующие базы как есть.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'user'
+);
+
+CREATE TABLE IF NOT EXISTS user_chanels (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    channel_name TEXT NOT NULL,
+    channel_link TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_group (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    group_name TEXT NOT NULL,
+    group_id BIGINT
+);
+
+CREATE TABLE IF NOT EXISTS group_channel (
+    id SERIAL PRIMARY KEY,
+    group_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id SERIAL PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    channel_name TEXT NOT NULL,
+    post_id BIGINT NOT NULL,
+    post_text TEXT,
+    user_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,66 @@
+-- Индексы под запросы из database/__init__.py.
+-- Перед уникальными индексами убираем дубликаты, оставляя самую раннюю запись.
+-- Удалённые строки сохраняются в таблицы *_duplicates, пустые таблицы удаляются в конце.
+
+CREATE TABLE IF NOT EXISTS users_duplicates (LIKE users, removed_at TIMESTAMPTZ NOT NULL DEFAULT now());
+CREATE TABLE IF NOT EXISTS user_chanels_duplicates (
+    LIKE user_chanels, removed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS group_channel_duplicates (
+    LIKE group_channel, removed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+WITH removed AS (
+    DELETE FROM users a USING users b WHERE a.user_id = b.user_id AND a.id > b.id RETURNING a.*
+)
+INSERT INTO users_duplicates SELECT * FROM removed;
+CREATE UNIQUE INDEX IF NOT EXISTS users_user_id_key ON users (user_id);
+
+-- get_channel, save_channel, delete_channel, JOIN в get_channels_by_group
+WITH removed AS (
+    DELETE FROM user_chanels a USING user_chanels b
+        WHERE a.channel_id = b.channel_id AND a.id > b.id
+        RETURNING a.*
+)
+INSERT INTO user_chanels_duplicates SELECT * FROM removed;
+CREATE UNIQUE INDEX IF NOT EXISTS user_chanels_channel_id_key ON user_chanels (channel_id);
+
+-- get_user_channels, get_total_user_channels, get_channels_by_user (index-only scan)
+CREATE INDEX IF NOT EXISTS user_chanels_user_id_channel_name_idx
+    ON user_chanels (user_id, channel_name) INCLUDE (channel_id, channel_link);
+
+-- get_channels: ORDER BY channel_name
+CREATE INDEX IF NOT EXISTS user_chanels_channel_name_idx ON user_chanels (channel_name);
+
+-- get_groups, get_group, get_total_groups
+CREATE INDEX IF NOT EXISTS user_group_user_id_group_name_idx ON user_group (user_id, group_name);
+
+-- get_channels_by_group, get_total_channels_for_group, group_add_channels (ON CONFLICT)
+WITH removed AS (
+    DELETE FROM group_channel a USING group_channel b
+        WHERE a.group_id = b.group_id AND a.channel_id = b.channel_id AND a.ctid > b.ctid
+        RETURNING a.*
+)
+INSERT INTO group_channel_duplicates SELECT * FROM removed;
+CREATE UNIQUE INDEX IF NOT EXISTS group_channel_group_id_channel_id_key
+    ON group_channel (group_id, channel_id);
+
+-- get_posts: WHERE channel_id ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS posts_channel_id_created_at_idx ON posts (channel_id, created_at DESC);
+
+DO $$
+DECLARE
+    backup TEXT;
+    removed BIGINT;
+BEGIN
+    FOREACH backup IN ARRAY ARRAY['users_duplicates', 'user_chanels_duplicates', 'group_channel_duplicates']
+    LOOP
+        EXECUTE format('SELECT count(*) FROM %I', backup) INTO removed;
+
+        IF removed = 0 THEN
+            EXECUTE format('DROP TABLE %I', backup);
+        ELSE
+            RAISE NOTICE 'Removed % duplicate rows, they are saved in %', removed, backup;
+        END IF;
+    END LOOP;
+END $$;
@@ -0,0 +1,48 @@
+-- posts разбивается на помесячные партиции по created_at.
+-- Партиции называются posts_YYYY_MM, строки вне созданных партиций попадают в posts_default.
+
+ALTER TABLE posts RENAME TO posts_legacy;
+ALTER INDEX IF EXISTS posts_channel_id_created_at_idx RENAME TO posts_legacy_channel_id_created_at_idx;
+
+CREATE TABLE posts (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+    channel_id BIGINT NOT NULL,
+    channel_name TEXT NOT NULL,
+    post_id BIGINT NOT NULL,
+    post_text TEXT,
+    user_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX posts_channel_id_created_at_idx ON posts (channel_id, created_at DESC);
+
+CREATE TABLE posts_default PARTITION OF posts DEFAULT;
+
+DO $$
+DECLARE
+    month TIMESTAMP;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', coalesce(min(created_at)::timestamp, now())),
+            date_trunc('month', now()) + interval '3 month',
+            interval '1 month'
+        )
+        FROM posts_legacy
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF posts FOR VALUES FROM (%L) TO (%L)',
+            'posts_' || to_char(month, 'YYYY_MM'),
+            month,
+            month + interval '1 month'
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO posts (id, channel_id, channel_name, post_id, post_text, user_id, created_at)
+SELECT id, channel_id, channel_name, post_id, post_text, user_id, created_at FROM posts_legacy;
+
+SELECT setval(pg_get_serial_sequence('posts', 'id'), coalesce(max(id), 0) + 1, false) FROM posts;
+
+DROP TABLE posts_legacy;
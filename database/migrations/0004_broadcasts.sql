@@ -0,0 +1,37 @@
+-- Текст рассылки хранится один раз в broadcasts, posts остаётся журналом доставок по каналам.
+
+CREATE TABLE broadcasts (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    post_id BIGINT NOT NULL,
+    post_text TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX broadcasts_created_at_idx ON broadcasts (created_at);
+
+ALTER TABLE posts ADD COLUMN broadcast_id BIGINT;
+
+-- Раньше одна рассылка записывалась строкой на каждый канал с одинаковым текстом
+INSERT INTO broadcasts (user_id, post_id, post_text, created_at)
+SELECT DISTINCT user_id, post_id, post_text, created_at FROM posts;
+
+UPDATE posts p
+SET broadcast_id = b.id
+FROM broadcasts b
+WHERE b.user_id = p.user_id
+    AND b.post_id = p.post_id
+    AND b.created_at = p.created_at
+    AND b.post_text IS NOT DISTINCT FROM p.post_text;
+
+ALTER TABLE posts ALTER COLUMN broadcast_id SET NOT NULL;
+ALTER TABLE posts
+    ADD FOREIGN KEY (broadcast_id) REFERENCES broadcasts (id) ON DELETE CASCADE;
+
+CREATE INDEX posts_broadcast_id_idx ON posts (broadcast_id);
+
+ALTER TABLE posts
+    DROP COLUMN channel_name,
+    DROP COLUMN post_id,
+    DROP COLUMN post_text,
+    DROP COLUMN user_id;
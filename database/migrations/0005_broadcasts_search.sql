@@ -0,0 +1,7 @@
+-- Полнотекстовый поиск по рассылкам: русская и английская морфология в одном tsvector.
+
+ALTER TABLE broadcasts ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('russian', coalesce(post_text, '')) || to_tsvector('english', coalesce(post_text, ''))
+) STORED;
+
+CREATE INDEX broadcasts_search_vector_idx ON broadcasts USING GIN (search_vector);
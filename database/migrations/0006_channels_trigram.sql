@@ -0,0 +1,7 @@
+-- Поиск каналов по подстроке названия (ILIKE '%...%') в клавиатурах выбора каналов.
+-- Расширение всегда ставится в public: миграции временной схемы plan_check не должны ни
+-- терять класс операторов, ни создавать расширение, которое удалится вместе со схемой.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public;
+
+CREATE INDEX user_chanels_channel_name_trgm_idx ON user_chanels USING GIN (channel_name public.gin_trgm_ops);
@@ -0,0 +1,8 @@
+-- Состояние бота в канале по данным фоновой проверки: рассылка пропускает недоступные каналы.
+
+ALTER TABLE user_chanels
+    ADD COLUMN bot_status TEXT,
+    ADD COLUMN is_reachable BOOLEAN NOT NULL DEFAULT TRUE,
+    ADD COLUMN status_checked_at TIMESTAMP;
+
+CREATE INDEX user_chanels_unreachable_idx ON user_chanels (channel_id) WHERE NOT is_reachable;
@@ -0,0 +1,8 @@
+-- Дополнительные боты из пула, которые являются администраторами канала и могут в него публиковать.
+
+CREATE TABLE IF NOT EXISTS channel_bots (
+    channel_id BIGINT NOT NULL,
+    bot_id BIGINT NOT NULL,
+    checked_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (channel_id, bot_id)
+);
@@ -0,0 +1,8 @@
+-- Шаблоны шапки и подписи постов. NULL значит шаблон по умолчанию из настроек,
+-- у канала приоритет выше, чем у группы, в которую он входит.
+
+ALTER TABLE user_chanels ADD COLUMN IF NOT EXISTS header_template TEXT;
+ALTER TABLE user_chanels ADD COLUMN IF NOT EXISTS footer_template TEXT;
+
+ALTER TABLE user_group ADD COLUMN IF NOT EXISTS header_template TEXT;
+ALTER TABLE user_group ADD COLUMN IF NOT EXISTS footer_template TEXT;
@@ -0,0 +1,122 @@
+-- Счётчики для клавиатур вместо COUNT(*) на каждый показ. Поддерживаются триггерами
+-- в той же транзакции, что и изменение строк, поэтому всегда совпадают с данными.
+--   channels       (key = 0)        — все каналы
+--   user_channels  (key = user_id)  — каналы пользователя
+--   user_groups    (key = user_id)  — группы пользователя
+--   group_channels (key = group_id) — существующие каналы группы
+-- user_id каналов и групп после вставки не меняется, поэтому UPDATE триггеров не требует.
+
+CREATE TABLE IF NOT EXISTS counters (
+    scope TEXT NOT NULL,
+    key BIGINT NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, key)
+);
+
+-- Триггеры уровня оператора: пачка из save_channels меняет каждый счётчик один раз
+
+CREATE OR REPLACE FUNCTION counters_user_chanels() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO counters (scope, key, value)
+        SELECT 'channels', 0, count(*) FROM new_rows HAVING count(*) > 0
+        UNION ALL
+        SELECT 'user_channels', user_id, count(*) FROM new_rows GROUP BY user_id
+        UNION ALL
+        SELECT 'group_channels', g.group_id, count(*)
+        FROM new_rows n JOIN group_channel g ON g.channel_id = n.channel_id
+        GROUP BY g.group_id
+        ON CONFLICT (scope, key) DO UPDATE SET value = counters.value + EXCLUDED.value;
+    ELSE
+        UPDATE counters c SET value = c.value - d.value
+        FROM (
+            SELECT 'channels' AS scope, 0::bigint AS key, count(*) AS value FROM old_rows
+            UNION ALL
+            SELECT 'user_channels', user_id, count(*) FROM old_rows GROUP BY user_id
+            UNION ALL
+            SELECT 'group_channels', g.group_id, count(*)
+            FROM old_rows o JOIN group_channel g ON g.channel_id = o.channel_id
+            GROUP BY g.group_id
+        ) d
+        WHERE c.scope = d.scope AND c.key = d.key;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION counters_group_channel() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO counters (scope, key, value)
+        SELECT 'group_channels', n.group_id, count(*)
+        FROM new_rows n
+        WHERE EXISTS (SELECT 1 FROM user_chanels u WHERE u.channel_id = n.channel_id)
+        GROUP BY n.group_id
+        ON CONFLICT (scope, key) DO UPDATE SET value = counters.value + EXCLUDED.value;
+    ELSE
+        -- Счётчик уже удалённой группы не воскрешаем
+        UPDATE counters c SET value = c.value - d.value
+        FROM (
+            SELECT o.group_id, count(*) AS value
+            FROM old_rows o
+            WHERE EXISTS (SELECT 1 FROM user_chanels u WHERE u.channel_id = o.channel_id)
+            GROUP BY o.group_id
+        ) d
+        WHERE c.scope = 'group_channels' AND c.key = d.group_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION counters_user_group() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO counters (scope, key, value)
+        SELECT 'user_groups', user_id, count(*) FROM new_rows GROUP BY user_id
+        ON CONFLICT (scope, key) DO UPDATE SET value = counters.value + EXCLUDED.value;
+    ELSE
+        UPDATE counters c SET value = c.value - d.value
+        FROM (SELECT user_id, count(*) AS value FROM old_rows GROUP BY user_id) d
+        WHERE c.scope = 'user_groups' AND c.key = d.user_id;
+
+        -- Каналы удалённой группы больше не считаются
+        DELETE FROM counters c USING old_rows o WHERE c.scope = 'group_channels' AND c.key = o.id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Таблицы со счётчиками блокируем, чтобы между заполнением и триггерами ничего не потерялось
+LOCK TABLE user_chanels, user_group, group_channel IN SHARE ROW EXCLUSIVE MODE;
+
+TRUNCATE counters;
+
+INSERT INTO counters (scope, key, value)
+SELECT 'channels', 0, count(*) FROM user_chanels
+UNION ALL
+SELECT 'user_channels', user_id, count(*) FROM user_chanels GROUP BY user_id
+UNION ALL
+SELECT 'user_groups', user_id, count(*) FROM user_group GROUP BY user_id
+UNION ALL
+SELECT 'group_channels', g.group_id, count(*)
+FROM group_channel g
+WHERE EXISTS (SELECT 1 FROM user_chanels u WHERE u.channel_id = g.channel_id)
+GROUP BY g.group_id;
+
+CREATE TRIGGER user_chanels_counters_insert AFTER INSERT ON user_chanels
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_user_chanels();
+CREATE TRIGGER user_chanels_counters_delete AFTER DELETE ON user_chanels
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_user_chanels();
+
+CREATE TRIGGER group_channel_counters_insert AFTER INSERT ON group_channel
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_group_channel();
+CREATE TRIGGER group_channel_counters_delete AFTER DELETE ON group_channel
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_group_channel();
+
+CREATE TRIGGER user_group_counters_insert AFTER INSERT ON user_group
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_user_group();
+CREATE TRIGGER user_group_counters_delete AFTER DELETE ON user_group
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_user_group();
@@ -0,0 +1,6 @@
+-- id сообщений доставки в канале (у альбома их несколько) и бот из пула, который её отправил.
+-- Нужны, чтобы исправить или удалить рассылку во всех каналах. NULL в bot_id — основной бот,
+-- старые доставки без message_ids изменить нельзя.
+
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS message_ids BIGINT[];
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS bot_id BIGINT;
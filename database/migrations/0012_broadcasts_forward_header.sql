@@ -0,0 +1,4 @@
+-- Строка «Переслано из канала» у рассылки, пересланной из другого канала. Хранится отдельно
+-- от текста, чтобы /edit_post вернул её над новым текстом. NULL — пост не пересланный.
+
+ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS forward_header TEXT;
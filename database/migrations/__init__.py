@@ -0,0 +1,67 @@
+from logging import getLogger
+from pathlib import Path
+
+from psycopg import connect, sql
+
+from database import dsn
+
+logger = getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent
+
+# Произвольный ключ advisory-lock, чтобы два процесса не мигрировали базу одновременно
+MIGRATIONS_LOCK_ID = 20241215
+
+
+def get_migrations() -> list[tuple[int, str, str]]:
+    """Список миграций `(версия, имя, sql)`, отсортированный по версии."""
+    migrations = []
+
+    for path in sorted(MIGRATIONS_DIR.glob('*.sql')):
+        version, name = path.stem.split('_', 1)
+        migrations.append((int(version), name, path.read_text(encoding='utf-8')))
+
+    return migrations
+
+
+def migrate(schema: str | None = None):
+    """Применить все новые миграции. Повторный запуск ничего не меняет."""
+    with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+        if schema:
+            cur.execute(sql.SQL('CREATE SCHEMA IF NOT EXISTS {}').format(sql.Identifier(schema)))
+            cur.execute(sql.SQL('SET search_path TO {}').format(sql.Identifier(schema)))
+
+        # RAISE NOTICE из миграций (например, о сохранённых дубликатах) попадает в лог
+        connection.add_notice_handler(
+            lambda notice: logger.info(f'Migration notice: {notice.message_primary}')
+        )
+        cur.execute('SELECT pg_advisory_lock(%s)', (MIGRATIONS_LOCK_ID,))
+
+        try:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+                """
+            )
+            cur.execute('SELECT version FROM schema_migrations')
+            applied = {row[0] for row in cur.fetchall()}
+
+            for version, name, migration in get_migrations():
+                if version in applied:
+                    continue
+
+                with connection.transaction():
+                    cur.execute(migration)  # type: ignore
+                    cur.execute(
+                        'INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                        (version, name),
+                    )
+
+                logger.info(f'Applied migration {version:04d}_{name}')
+
+        finally:
+            cur.execute('SELECT pg_advisory_unlock(%s)', (MIGRATIONS_LOCK_ID,))
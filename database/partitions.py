@@ -0,0 +1,160 @@
+import gzip
+from datetime import date, datetime
+from logging import getLogger
+from pathlib import Path
+
+from psycopg import connect, sql
+from psycopg.errors import Error
+
+from config.environment import settings
+from database import dsn
+
+logger = getLogger(__name__)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'posts_{month:%Y_%m}'
+
+
+def get_posts_partitions() -> dict[date, str]:
+    """Помесячные партиции posts: первое число месяца -> имя таблицы."""
+    with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.oid = 'posts'::regclass AND child.relname ~ '^posts_\\d{4}_\\d{2}$'
+            """
+        )
+        names = [row[0] for row in cur.fetchall()]
+
+    return {datetime.strptime(name, 'posts_%Y_%m').date(): name for name in names}
+
+
+def get_detached_posts_partitions() -> dict[date, str]:
+    """Таблицы posts_YYYY_MM, уже отсоединённые от posts, но ещё не выгруженные в архив."""
+    with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT relname
+            FROM pg_class
+            WHERE relnamespace = (SELECT relnamespace FROM pg_class WHERE oid = 'posts'::regclass)
+                AND relkind = 'r'
+                AND relname ~ '^posts_\\d{4}_\\d{2}$'
+                AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = pg_class.oid)
+            """
+        )
+        names = [row[0] for row in cur.fetchall()]
+
+    return {datetime.strptime(name, 'posts_%Y_%m').date(): name for name in names}
+
+
+def ensure_posts_partitions(months_ahead: int | None = None):
+    """Создать партиции posts с текущего месяца на `months_ahead` месяцев вперёд."""
+    if months_ahead is None:
+        months_ahead = settings.POSTS_PARTITIONS_AHEAD
+
+    existing = get_posts_partitions()
+    current = date.today().replace(day=1)
+
+    with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+
+            if month in existing:
+                continue
+
+            try:
+                cur.execute(
+                    sql.SQL('CREATE TABLE {} PARTITION OF posts FOR VALUES FROM ({}) TO ({})').format(
+                        sql.Identifier(partition_name(month)),
+                        sql.Literal(month),
+                        sql.Literal(add_months(month, 1)),
+                    )
+                )
+            except Error as e:
+                # Обычно значит, что строки этого месяца уже лежат в posts_default
+                logger.error(f'Failed to create partition {partition_name(month)}: {e}')
+                continue
+
+            logger.info(f'Created partition {partition_name(month)}')
+
+
+def archive_posts_partitions(retention_months: int | None = None) -> list[Path]:
+    """Отсоединить партиции старше срока хранения, выгрузить их в csv.gz и удалить."""
+    if retention_months is None:
+        retention_months = settings.POSTS_RETENTION_MONTHS
+
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(date.today().replace(day=1), -retention_months)
+    archive_dir = Path(settings.POSTS_ARCHIVE_DIR)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archived = []
+
+    attached = get_posts_partitions()
+    # Отсоединённые, но не выгруженные в прошлый раз таблицы доделываем вместе с новыми
+    partitions = {**get_detached_posts_partitions(), **attached}
+
+    for month, name in sorted(partitions.items()):
+        if month >= cutoff:
+            break
+
+        path = archive_dir / f'{name}.csv.gz'
+        table = sql.Identifier(name)
+
+        with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+            # ACCESS EXCLUSIVE на posts держится только на время отсоединения, а не выгрузки.
+            # DETACH CONCURRENTLY недоступен из-за posts_default
+            if month in attached:
+                cur.execute(sql.SQL('ALTER TABLE posts DETACH PARTITION {}').format(table))
+
+            # Если выгрузка упадёт, таблица останется отсоединённой и её подхватит следующий запуск
+            with (
+                gzip.open(path, 'wb') as file,
+                cur.copy(sql.SQL('COPY {} TO STDOUT (FORMAT csv, HEADER)').format(table)) as copy,
+            ):
+                for data in copy:
+                    file.write(data)
+
+            cur.execute(sql.SQL('DROP TABLE {}').format(table))
+
+        logger.info(f'Archived partition {name} to {path}')
+        archived.append(path)
+
+    if archived:
+        archived.append(archive_orphan_broadcasts(cutoff, archive_dir))
+
+    return archived
+
+
+def archive_orphan_broadcasts(cutoff: date, archive_dir: Path) -> Path:
+    """Выгрузить и удалить рассылки, у которых не осталось доставок после архивации партиций."""
+    path = archive_dir / f'broadcasts_before_{cutoff:%Y_%m}.csv.gz'
+
+    with connect(dsn) as connection, connection.cursor() as cur:
+        query = sql.SQL(
+            """
+            COPY (
+                DELETE FROM broadcasts b
+                WHERE b.created_at < {}
+                    AND NOT EXISTS (SELECT 1 FROM posts p WHERE p.broadcast_id = b.id)
+                RETURNING *
+            ) TO STDOUT (FORMAT csv, HEADER)
+            """
+        ).format(sql.Literal(cutoff))
+
+        with gzip.open(path, 'ab') as file, cur.copy(query) as copy:
+            for data in copy:
+                file.write(data)
+
+    logger.info(f'Archived broadcasts older than {cutoff} to {path}')
+    return path
@@ -0,0 +1,185 @@
+"""Проверка планов горячих запросов на синтетических данных.
+
+Запуск: `python -m database.plans`. Создаёт схему `plan_check`, применяет к ней миграции,
+заполняет таблицы и падает с ненулевым кодом, если план хотя бы одного запроса содержит Seq Scan.
+"""
+
+import sys
+from datetime import date, datetime, time, timedelta
+from logging import getLogger
+
+from psycopg import connect, sql
+
+from config.log import configure_logging
+from database import dsn, posts_query
+from database.migrations import migrate
+
+logger = getLogger(__name__)
+
+SCHEMA = 'plan_check'
+
+# Seq Scan по пустым и крошечным таблицам (например, будущим партициям posts) не считается ошибкой
+MIN_RELATION_ROWS = 1000
+
+SYNTHETIC_DATA = [
+    """
+    DO $$
+    DECLARE
+        month TIMESTAMP;
+    BEGIN
+        FOR month IN
+            SELECT generate_series(
+                date_trunc('month', now() - interval '2 year'),
+                date_trunc('month', now() - interval '1 month'),
+                interval '1 month'
+            )
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF posts FOR VALUES FROM (%L) TO (%L)',
+                'posts_' || to_char(month, 'YYYY_MM'),
+                month,
+                month + interval '1 month'
+            );
+        END LOOP;
+    END $$
+    """,
+    """
+    INSERT INTO users (user_id, role)
+    SELECT i, (ARRAY['admin', 'operator', 'user'])[1 + i % 3] FROM generate_series(1, 10000) i
+    """,
+    """
+    INSERT INTO user_chanels (user_id, channel_id, channel_name, channel_link)
+    SELECT 1 + i % 1000, -1000000000000 - i, 'Channel ' || i, 'https://t.me/channel_' || i
+    FROM generate_series(1, 100000) i
+    """,
+    """
+    INSERT INTO user_group (user_id, group_name)
+    SELECT 1 + i % 1000, 'Group ' || i FROM generate_series(1, 10000) i
+    """,
+    """
+    INSERT INTO group_channel (group_id, channel_id)
+    SELECT 1 + i % 10000, -1000000000000 - i FROM generate_series(1, 100000) i
+    """,
+    """
+    INSERT INTO broadcasts (user_id, post_id, post_text, created_at)
+    SELECT 1 + i % 1000, i, 'Post ' || i, now() - (i % 730) * interval '1 day'
+    FROM generate_series(1, 50000) i
+    """,
+    """
+    INSERT INTO posts (broadcast_id, channel_id, created_at)
+    SELECT b.id, -1000000000000 - (b.id * 10 + n) % 100000, b.created_at
+    FROM broadcasts b, generate_series(1, 10) n
+    """,
+]
+
+HOT_QUERIES: dict[str, tuple[str, tuple | list]] = {
+    'get_user': ('SELECT * FROM users WHERE user_id = %s', (500,)),
+    'get_channel': ('SELECT * FROM user_chanels WHERE channel_id = %s', (-1000000000500,)),
+    'get_user_channels': (
+        'SELECT channel_id, channel_name, channel_link FROM user_chanels WHERE user_id = %s '
+        'LIMIT %s OFFSET %s',
+        (500, 20, 40),
+    ),
+    'get_counter': (
+        'SELECT value FROM counters WHERE scope = %s AND key = %s',
+        ('user_channels', 500),
+    ),
+    'search_user_channels': (
+        'SELECT * FROM user_chanels WHERE user_id = %s AND channel_name ILIKE %s '
+        'ORDER BY channel_name ASC LIMIT %s',
+        (500, '%annel 12%', 500),
+    ),
+    'get_channels': (
+        'SELECT * FROM user_chanels c ORDER BY c.channel_name ASC LIMIT %s OFFSET %s',
+        (20, 40),
+    ),
+    'get_groups': (
+        'SELECT * FROM user_group c WHERE c.user_id = %s ORDER BY c.group_name ASC '
+        'LIMIT %s OFFSET %s',
+        (500, 20, 0),
+    ),
+    'get_group_channel_ids': (
+        'SELECT g.channel_id FROM group_channel g WHERE g.group_id = %s '
+        'AND EXISTS (SELECT 1 FROM user_chanels u WHERE u.channel_id = g.channel_id) '
+        'ORDER BY g.channel_id',
+        (500,),
+    ),
+    'get_channels_by_ids': (
+        'SELECT id, user_id, channel_id, channel_name, channel_link FROM user_chanels '
+        'WHERE channel_id = ANY(%s)',
+        ([-1000000000500, -1000000000501],),
+    ),
+    # Тот же запрос, что выполняет iter_posts
+    'iter_posts': posts_query([-1000000000500, -1000000000501]),
+    'iter_posts_period': posts_query(
+        [-1000000000500, -1000000000501],
+        datetime.combine(date.today() - timedelta(days=60), time()),
+        datetime.combine(date.today(), time()),
+    ),
+    'search_broadcasts': (
+        'SELECT b.id, b.post_text FROM broadcasts b '
+        "WHERE b.search_vector @@ (websearch_to_tsquery('russian', %s) "
+        "|| websearch_to_tsquery('english', %s)) ORDER BY b.created_at DESC LIMIT 11",
+        ('Post 1234', 'Post 1234'),
+    ),
+}
+
+
+def find_seq_scans(plan: dict) -> list[str]:
+    found = []
+
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name', '?'))
+
+    for child in plan.get('Plans', []):
+        found += find_seq_scans(child)
+
+    return found
+
+
+def check_plans() -> bool:
+    with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+        cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {} CASCADE').format(sql.Identifier(SCHEMA)))
+
+    migrate(schema=SCHEMA)
+    failed = False
+
+    with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+        try:
+            cur.execute(sql.SQL('SET search_path TO {}').format(sql.Identifier(SCHEMA)))
+
+            logger.info('Generating synthetic data')
+            for query in SYNTHETIC_DATA:
+                cur.execute(query)  # type: ignore
+
+            cur.execute('ANALYZE')
+
+            for name, (query, params) in HOT_QUERIES.items():
+                cur.execute(f'EXPLAIN (FORMAT JSON) {query}', params)  # type: ignore
+                plan = cur.fetchone()[0][0]['Plan']  # type: ignore
+                seq_scans = find_seq_scans(plan)
+
+                if seq_scans:
+                    cur.execute(
+                        'SELECT relname FROM pg_class '
+                        'WHERE relnamespace = %s::regnamespace AND relname = ANY(%s) '
+                        'AND reltuples >= %s',
+                        (SCHEMA, seq_scans, MIN_RELATION_ROWS),
+                    )
+                    seq_scans = [row[0] for row in cur.fetchall()]
+
+                if seq_scans:
+                    failed = True
+                    logger.error(f'{name}: Seq Scan on {", ".join(seq_scans)}')
+                else:
+                    logger.info(f'{name}: OK')
+
+        finally:
+            cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {} CASCADE').format(sql.Identifier(SCHEMA)))
+
+    return not failed
+
+
+if __name__ == '__main__':
+    configure_logging()
+    sys.exit(0 if check_plans() else 1)
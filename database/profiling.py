@@ -0,0 +1,128 @@
+import random
+import re
+from dataclasses import dataclass, field
+from logging import getLogger
+from queue import Full, Queue
+from threading import Lock, Thread
+
+from psycopg import connect
+
+from config.environment import settings
+from database import QueryEvent, add_query_hook, dsn
+
+logger = getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|-?\b\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r'\s+')
+
+# Запросы для EXPLAIN ANALYZE ждут здесь отдельного потока, чтобы не блокировать цикл событий бота
+explain_queue: Queue[QueryEvent] = Queue(maxsize=100)
+
+
+@dataclass(slots=True)
+class QueryStats:
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    rows: int = 0
+    callers: set[str] = field(default_factory=set)
+
+
+stats: dict[str, QueryStats] = {}
+# execute вызывают из цикла событий и из потоков asyncio.to_thread, поэтому статистику меняем под замком
+stats_lock = Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Заменить литералы на `?`, чтобы одинаковые запросы с разными значениями сводились вместе."""
+    return WHITESPACE.sub(' ', LITERALS.sub('?', query)).strip()
+
+
+def record_query(event: QueryEvent):
+    query = normalize_query(event.query)
+
+    with stats_lock:
+        query_stats = stats.setdefault(query, QueryStats())
+        query_stats.calls += 1
+        query_stats.total += event.duration
+        query_stats.max = max(query_stats.max, event.duration)
+        query_stats.rows += max(event.rows or 0, 0)
+        query_stats.callers.add(event.caller)
+
+
+def log_slow_query(event: QueryEvent):
+    duration_ms = event.duration * 1000
+
+    if duration_ms < settings.DB_SLOW_QUERY_MS:
+        return
+
+    logger.warning(
+        f'Slow query in {event.caller}: {duration_ms:.1f} ms, rows: {event.rows}, '
+        f'query: {normalize_query(event.query)}'
+    )
+
+    if random.random() >= settings.DB_EXPLAIN_SAMPLE_RATE:
+        return
+
+    # EXPLAIN ANALYZE выполняет запрос повторно, поэтому трогаем только чтение
+    if not event.query.lstrip().upper().startswith('SELECT'):
+        return
+
+    try:
+        explain_queue.put_nowait(event)
+    except Full:
+        logger.warning(f'Explain queue is full, skipping plan of slow query from {event.caller}')
+
+
+def explain_query(event: QueryEvent):
+    try:
+        with connect(dsn, autocommit=True) as connection, connection.cursor() as cur:
+            cur.execute(f'EXPLAIN (ANALYZE, BUFFERS) {event.query}', event.params)  # type: ignore
+            plan = '\n'.join(row[0] for row in cur.fetchall())
+    except Exception as e:
+        logger.error(f'Failed to explain slow query from {event.caller}: {e}')
+        return
+
+    logger.warning(f'Plan of slow query from {event.caller}:\n{plan}')
+
+
+def explain_worker():
+    while True:
+        explain_query(explain_queue.get())
+
+
+def top_queries(limit: int = 10) -> str:
+    """Сводка по самым затратным запросам (по суммарному времени)."""
+    with stats_lock:
+        ordered = sorted(
+            (
+                (query, QueryStats(s.calls, s.total, s.max, s.rows, set(s.callers)))
+                for query, s in stats.items()
+            ),
+            key=lambda item: item[1].total,
+            reverse=True,
+        )
+
+    text = ''
+    for query, query_stats in ordered[:limit]:
+        average = query_stats.total / query_stats.calls * 1000
+        text += (
+            f'{query_stats.total * 1000:.1f} ms total, {query_stats.calls} calls, '
+            f'avg {average:.2f} ms, max {query_stats.max * 1000:.2f} ms, '
+            f'rows {query_stats.rows}\n'
+            f'- Callers: {", ".join(sorted(query_stats.callers))}\n'
+            f'- Query: {query}\n\n'
+        )
+
+    return text
+
+
+def reset_stats():
+    with stats_lock:
+        stats.clear()
+
+
+def install_query_profiling():
+    add_query_hook(record_query)
+    add_query_hook(log_slow_query)
+    Thread(target=explain_worker, name='explain-slow-queries', daemon=True).start()
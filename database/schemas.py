@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Literal, Union
+from typing import Literal, NamedTuple
 
-from pydantic import BaseModel, PositiveInt, Field
+from pydantic import BaseModel, PositiveInt
 
 
 class UserModel(BaseModel):
@@ -10,25 +10,50 @@ class UserModel(BaseModel):
     role: Literal['admin', 'operator', 'user']  # Заменил 'false' на 'user'
 
 
-class ChannelModel(BaseModel):
-    id: Union[PositiveInt, None] = Field(default=None)
-    user_id: PositiveInt
+# Строки из БД не валидируются: данные уже прошли проверку при записи,
+# а pydantic на тысячах строк заметно медленнее простых кортежей
+class ChannelRow(NamedTuple):
+    id: int | None
+    user_id: int
     channel_id: int
     channel_name: str
     channel_link: str
 
 
-class GroupModel(BaseModel):
-    id: PositiveInt
-    user_id: PositiveInt
+class ChannelTemplateRow(NamedTuple):
+    channel_id: int
+    channel_name: str
+    channel_link: str
+    header_template: str | None
+    footer_template: str | None
+
+
+class GroupRow(NamedTuple):
+    id: int
+    user_id: int
     group_name: str
-    group_id: int
+    group_id: int | None
 
 
-class PostModel(BaseModel):
-    id: PositiveInt
+class PostRow(NamedTuple):
+    id: int
     channel_id: int
     channel_name: str
+    channel_link: str | None
     post_id: int
     post_text: str
     created_at: datetime
+
+
+class DeliveryRow(NamedTuple):
+    channel_id: int
+    message_ids: list[int] | None
+    bot_id: int | None
+
+
+class BroadcastRow(NamedTuple):
+    id: int
+    post_text: str
+    created_at: datetime
+    headline: str | None
+    channel_names: list[str]
@@ -0,0 +1,132 @@
+import asyncio
+from logging import getLogger
+
+from telegram import Bot, Message
+from telegram.constants import ParseMode
+from telegram.error import Forbidden, TelegramError
+from telegram.ext import ExtBot
+
+from config.environment import settings
+from database import get_channel_bots, set_channel_bots, set_channels_health
+from utils.progress import ProgressReporter
+from utils.rate_limiter import PriorityRateLimiter
+from utils.request import build_request
+from utils.templates import get_templates
+
+logger = getLogger(__name__)
+
+
+class BotPool:
+    """Дополнительные боты для рассылок, у каждого свой лимит запросов Telegram.
+
+    Бот из пула может публиковать только в каналах, где он администратор (это отмечает проверка
+    каналов в `channel_bots`), и не видит чат пользователя с основным ботом, поэтому через пул
+    отправляются только текстовые сообщения. Всё остальное идёт через основной бот.
+    """
+
+    def __init__(self, tokens: list[str]):
+        self.bots: list[ExtBot] = [
+            ExtBot(
+                token,
+                request=build_request(),
+                rate_limiter=PriorityRateLimiter(),
+            )
+            for token in tokens
+        ]
+
+    async def initialize(self):
+        for bot in self.bots:
+            await bot.initialize()
+            logger.info(f'Bot @{bot.username} is added to the pool')
+
+    async def shutdown(self):
+        for bot in self.bots:
+            await bot.shutdown()
+
+    def assign(self, primary: Bot, channel_ids: list[int]) -> list[tuple[Bot, list[int]]]:
+        """Распределить каналы поровну между ботами, которые могут в них публиковать."""
+        channel_bots = get_channel_bots(channel_ids)
+        bots = [primary, *self.bots]
+        assignment: list[list[int]] = [[] for _ in bots]
+
+        for channel_id in channel_ids:
+            allowed = channel_bots.get(channel_id, set())
+            candidates = [0] + [
+                index for index, bot in enumerate(bots) if index and bot.id in allowed
+            ]
+            index = min(candidates, key=lambda candidate: len(assignment[candidate]))
+            assignment[index].append(channel_id)
+
+        return list(zip(bots, assignment, strict=True))
+
+    async def send_text(
+        self,
+        primary: Bot,
+        message: Message,
+        channel_ids: list[int],
+        progress: ProgressReporter | None = None,
+    ):
+        """Разослать текст сообщения всем ботам пула параллельно: `(отправленные, ошибки)`."""
+        channels = await get_templates(primary, channel_ids)
+        sent: dict[int, dict] = {}
+        failed: list[int] = []
+        # Каналы, откуда бота удалили: bot_id -> [channel_id]
+        kicked: dict[int, list[int]] = {}
+
+        async def deliver(bot: Bot, channel_id: int):
+            channel = channels.get(channel_id)
+
+            if not channel:
+                failed.append(channel_id)
+                return
+
+            try:
+                msg = await bot.send_message(
+                    chat_id=channel_id,
+                    text=channel.render(message.text or ''),
+                    parse_mode=ParseMode.MARKDOWN,
+                )
+            except TelegramError as e:
+                logger.error(f'Bot {bot.id} failed to send message to channel {channel_id}: {e}')
+                failed.append(channel_id)
+
+                if isinstance(e, Forbidden):
+                    kicked.setdefault(bot.id, []).append(channel_id)
+
+                return
+
+            sent[channel_id] = {
+                'channel_name': channel.channel_name,
+                'channel_link': channel.channel_link,
+                'message_link': msg.link,
+                'message_ids': [msg.message_id],
+                # Изменить сообщение может только отправивший его бот
+                'bot_id': bot.id if bot is not primary else None,
+            }
+
+        async def send(bot: Bot, bot_channel_ids: list[int]):
+            for channel_id in bot_channel_ids:
+                await deliver(bot, channel_id)
+
+                if progress:
+                    await progress.update(len(sent) + len(failed))
+
+        assignment = self.assign(primary, channel_ids)
+        await asyncio.gather(*(send(bot, ids) for bot, ids in assignment if ids))
+
+        for bot_id, kicked_ids in kicked.items():
+            if bot_id == primary.id:
+                set_channels_health([(channel_id, 'kicked', False) for channel_id in kicked_ids])
+            else:
+                # Бот из пула больше не получает эти каналы, основной бот в них остаётся
+                set_channel_bots(bot_id, [(channel_id, False) for channel_id in kicked_ids])
+
+        logger.info(
+            f'Message is sent to {len(sent)} channels by {sum(1 for _, ids in assignment if ids)} bots, {len(failed)} failed'
+        )
+
+        # Порядок как в выборе пользователя
+        return {channel_id: sent[channel_id] for channel_id in channel_ids if channel_id in sent}, failed
+
+
+bot_pool = BotPool(settings.EXTRA_BOT_TOKENS)
@@ -0,0 +1,151 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from logging import getLogger
+
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from config.environment import settings
+from database import (
+    delete_deliveries,
+    get_broadcast_forward_header,
+    get_deliveries,
+    update_broadcast_text,
+)
+from database.schemas import DeliveryRow
+from utils.bot_pool import bot_pool
+from utils.progress import ProgressReporter
+from utils.templates import get_templates
+
+logger = getLogger(__name__)
+
+
+def get_delivery_bot(primary: Bot, delivery: DeliveryRow) -> Bot | None:
+    """Бот, который отправил доставку: только он может изменить своё сообщение."""
+    if delivery.bot_id is None:
+        return primary
+
+    return next((bot for bot in bot_pool.bots if bot.id == delivery.bot_id), None)
+
+
+async def with_retry(request: Callable[[], Awaitable]):
+    """Выполнить запрос, один раз подождав, если Telegram попросил снизить частоту."""
+    try:
+        return await request()
+    except RetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        return await request()
+
+
+async def run_for_deliveries(
+    primary: Bot,
+    deliveries: list[DeliveryRow],
+    action: Callable[[Bot, DeliveryRow], Awaitable],
+    progress: ProgressReporter | None = None,
+) -> tuple[list[int], list[int]]:
+    """Выполнить `action` для доставок параллельно, не больше BROADCAST_EDIT_CONCURRENCY сразу.
+
+    Запросы идут в каналы, поэтому ограничитель ставит их в полосу рассылок и ответы
+    пользователям не ждут. Возвращает `(успешные каналы, каналы с ошибкой)`.
+    """
+    semaphore = asyncio.Semaphore(settings.BROADCAST_EDIT_CONCURRENCY)
+    done: list[int] = []
+    failed: list[int] = []
+
+    async def run(delivery: DeliveryRow):
+        bot = get_delivery_bot(primary, delivery)
+
+        if not bot or not delivery.message_ids:
+            failed.append(delivery.channel_id)
+            return
+
+        async with semaphore:
+            try:
+                await action(bot, delivery)
+            except TelegramError as e:
+                logger.error(f'Failed to change broadcast message in channel {delivery.channel_id}: {e}')
+                failed.append(delivery.channel_id)
+            else:
+                done.append(delivery.channel_id)
+
+        if progress:
+            await progress.update(len(done) + len(failed))
+
+    await asyncio.gather(*(run(delivery) for delivery in deliveries))
+
+    return done, failed
+
+
+async def edit_broadcast(
+    primary: Bot, broadcast_id: int, text: str, progress: ProgressReporter | None = None
+) -> tuple[list[int], list[int]]:
+    """Заменить текст рассылки во всех каналах, с шапкой и подписью каждого канала.
+
+    У пересланного поста над новым текстом остаётся строка «Переслано из канала».
+    """
+    deliveries = get_deliveries(broadcast_id)
+    forward_header = get_broadcast_forward_header(broadcast_id)
+    templates = await get_templates(primary, [delivery.channel_id for delivery in deliveries])
+
+    async def edit(bot: Bot, delivery: DeliveryRow):
+        template = templates.get(delivery.channel_id)
+        new_text = forward_header + text
+        new_text = template.render(new_text) if template else new_text
+        # У альбома подпись хранится в первом сообщении
+        message_id = (delivery.message_ids or [])[0]
+
+        try:
+            await with_retry(
+                lambda: bot.edit_message_text(
+                    chat_id=delivery.channel_id,
+                    message_id=message_id,
+                    text=new_text,
+                    parse_mode=ParseMode.MARKDOWN,
+                )
+            )
+        except BadRequest as e:
+            if 'not modified' in e.message:
+                return
+
+            if 'no text' not in e.message:
+                raise
+
+            await with_retry(
+                lambda: bot.edit_message_caption(
+                    chat_id=delivery.channel_id,
+                    message_id=message_id,
+                    caption=new_text,
+                    parse_mode=ParseMode.MARKDOWN,
+                )
+            )
+
+    done, failed = await run_for_deliveries(primary, deliveries, edit, progress)
+
+    if done:
+        update_broadcast_text(broadcast_id, text)
+
+    logger.info(f'Broadcast {broadcast_id} is edited in {len(done)} channels, {len(failed)} failed')
+    return done, failed
+
+
+async def delete_broadcast(
+    primary: Bot, broadcast_id: int, progress: ProgressReporter | None = None
+) -> tuple[list[int], list[int]]:
+    """Удалить сообщения рассылки во всех каналах и убрать удалённые доставки из журнала."""
+    deliveries = get_deliveries(broadcast_id)
+
+    async def delete(bot: Bot, delivery: DeliveryRow):
+        await with_retry(
+            lambda: bot.delete_messages(
+                chat_id=delivery.channel_id, message_ids=delivery.message_ids or []
+            )
+        )
+
+    done, failed = await run_for_deliveries(primary, deliveries, delete, progress)
+
+    if done:
+        delete_deliveries(broadcast_id, done)
+
+    logger.info(f'Broadcast {broadcast_id} is deleted in {len(done)} channels, {len(failed)} failed')
+    return done, failed
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from time import monotonic
+from typing import Any
+
+
+class TTLCache:
+    """Небольшой LRU-кэш в памяти процесса с временем жизни записей."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+
+        if item is None:
+            return default
+
+        expires_at, value = item
+
+        if expires_at < monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key)
+
+        if value is None:
+            value = factory()
+            self.set(key, value)
+
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None):
+        """Удалить все записи или только те, ключи которых подходят под `predicate`."""
+        if predicate is None:
+            self._data.clear()
+            return
+
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
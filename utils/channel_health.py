@@ -0,0 +1,80 @@
+import asyncio
+from logging import getLogger
+
+from telegram import ChatMemberAdministrator, ChatMemberOwner
+from telegram.error import BadRequest, Forbidden, TelegramError
+from telegram.ext import ExtBot
+
+from config.environment import settings
+from database import get_channel_ids_after, set_channel_bots, set_channels_health
+
+logger = getLogger(__name__)
+
+
+async def check_channel(bot: ExtBot, channel_id: int) -> tuple[int, str, bool] | None:
+    """Статус бота в канале: `(channel_id, статус, доступен ли канал)` или None при временной ошибке."""
+    try:
+        member = await bot.get_chat_member(
+            channel_id, bot.id, rate_limit_args={'lane': 'background'}
+        )
+    except Forbidden:
+        return channel_id, 'kicked', False
+    except BadRequest as e:
+        if 'not found' in e.message.lower():
+            return channel_id, 'not_found', False
+
+        logger.error(f'Failed to check channel {channel_id}: {e}')
+        return None
+    except TelegramError as e:
+        logger.error(f'Failed to check channel {channel_id}: {e}')
+        return None
+
+    if isinstance(member, ChatMemberOwner):
+        return channel_id, member.status, True
+
+    if isinstance(member, ChatMemberAdministrator):
+        if not member.can_post_messages:
+            return channel_id, 'no_post_rights', False
+
+        return channel_id, member.status, True
+
+    return channel_id, member.status, False
+
+
+async def check_channels_health(bot: ExtBot, pool_bots: list[ExtBot] | None = None) -> int:
+    """Проверить все каналы пачками, не больше `CHANNEL_HEALTH_BATCH_SIZE` запросов за раз.
+
+    Для ботов из пула запоминаем, в каких каналах они могут публиковать.
+    """
+    last_channel_id = None
+    unreachable = 0
+
+    while True:
+        channel_ids = await asyncio.to_thread(
+            get_channel_ids_after, last_channel_id, settings.CHANNEL_HEALTH_BATCH_SIZE
+        )
+
+        if not channel_ids:
+            break
+
+        results = await asyncio.gather(*(check_channel(bot, channel_id) for channel_id in channel_ids))
+        statuses = [result for result in results if result]
+
+        await asyncio.to_thread(set_channels_health, statuses)
+
+        unreachable += sum(1 for _, _, is_reachable in statuses if not is_reachable)
+
+        for pool_bot in pool_bots or []:
+            results = await asyncio.gather(
+                *(check_channel(pool_bot, channel_id) for channel_id in channel_ids)
+            )
+            await asyncio.to_thread(
+                set_channel_bots,
+                pool_bot.id,
+                [(channel_id, is_reachable) for channel_id, _, is_reachable in filter(None, results)],
+            )
+        last_channel_id = channel_ids[-1]
+
+        await asyncio.sleep(settings.CHANNEL_HEALTH_BATCH_DELAY)
+
+    return unreachable
@@ -1,4 +1,5 @@
 import asyncio
+from copy import copy
 from datetime import datetime
 from io import BytesIO
 from logging import getLogger
@@ -6,6 +7,7 @@ from time import time
 from typing import Any
 
 from telegram import (
+    Bot,
     InputMedia,
     InputMediaAudio,
     InputMediaDocument,
@@ -17,10 +19,23 @@ from telegram import (
     User,
 )
 from telegram.constants import ParseMode
-from telegram.error import TelegramError
+from telegram.error import BadRequest, Forbidden, TelegramError
 from telegram.ext import ContextTypes
 
-from database import get_channel, save_post
+from config.log import SAMPLED
+from config.metrics import BROADCASTS_IN_FLIGHT, MEDIA_GROUPS_PENDING, track_in_progress
+from database import (
+    get_total_user_channels,
+    get_unreachable_channels,
+    get_user_channels,
+    save_broadcast,
+    search_user_channels,
+    set_channels_health,
+)
+from utils.bot_pool import bot_pool
+from utils.progress import ProgressReporter
+from utils.tasks import task_supervisor
+from utils.templates import get_forward_header, get_templates
 
 logger = getLogger(__name__)
 
@@ -64,6 +79,62 @@ async def get_user_data_context(
     return context.user_data
 
 
+def get_user_channels_page(
+    user_id: int, page: int, per_page: int, search_text: str | None = None
+) -> tuple[list, int]:
+    """Страница каналов пользователя и их общее количество, с учётом поиска по названию."""
+    if search_text:
+        found = search_user_channels(user_id, search_text)
+        return found[page * per_page : (page + 1) * per_page], len(found)
+
+    channels = get_user_channels(user_id, limit=per_page, offset=page * per_page)
+    return channels, get_total_user_channels(user_id)
+
+
+async def send_album(
+    bot: Bot,
+    chat_id: int,
+    medias: list[InputMedia],
+    caption: str,
+    from_chat_id: int,
+    message_ids: list[int],
+) -> tuple[str | None, list[int]]:
+    """Отправить альбом с подписью одним запросом, вернуть ссылку на него и id его сообщений.
+
+    Если Telegram не принял медиа (например, у пересланного альбома), копируем исходные сообщения
+    через `copy_messages` и дописываем подпись к первому из них.
+    """
+    # Копия первого медиа сохраняет спойлер, обложку, длительность и прочие поля
+    captioned = copy(medias[0])
+
+    with captioned._unfrozen():
+        captioned.caption = caption
+        captioned.parse_mode = ParseMode.MARKDOWN
+
+    try:
+        sent_messages = await bot.send_media_group(chat_id=chat_id, media=[captioned, *medias[1:]])
+        return sent_messages[0].link, [sent_message.message_id for sent_message in sent_messages]
+    except BadRequest as e:
+        if not message_ids:
+            raise
+
+        logger.error(f'Failed to send media group to {chat_id}, copying messages instead: {e}')
+
+    copied = await bot.copy_messages(
+        chat_id=chat_id, from_chat_id=from_chat_id, message_ids=message_ids
+    )
+    msg = await bot.edit_message_caption(
+        chat_id=chat_id,
+        message_id=copied[0].message_id,
+        caption=caption,
+        parse_mode=ParseMode.MARKDOWN,
+    )
+
+    link = msg.link if isinstance(msg, Message) else None
+    return link, [copied_message.message_id for copied_message in copied]
+
+
+@track_in_progress(MEDIA_GROUPS_PENDING)
 async def check_for_media(
     context: ContextTypes.DEFAULT_TYPE,
     message: Message,
@@ -81,59 +152,117 @@ async def check_for_media(
     if not media_group_data:
         raise Exception('Media group data not found')
 
-    while media_group_data.get('last_time_sended') + 3 > time():
-        await asyncio.sleep(1)
+    status = None
 
-    channels = media_group_data['channels']
-    medias = media_group_data['media']
-    caption = media_group_data['caption']
+    try:
+        while media_group_data.get('last_time_sended') + 3 > time():
+            await asyncio.sleep(1)
 
-    if isinstance(will_send_at, datetime):
-        delta = (will_send_at - datetime.now()).total_seconds()
+        channels = media_group_data['channels']
+        medias = media_group_data['media']
+        caption = media_group_data['caption']
+        forward_header = media_group_data.get('forward_header', '')
 
-        if delta > 0:
-            await asyncio.sleep(delta)
+        if isinstance(will_send_at, datetime):
+            delta = (will_send_at - datetime.now()).total_seconds()
 
-    for channel_id in channels:
-        assert isinstance(channel_id, int)
+            if delta > 0:
+                with task_supervisor.waiting():
+                    await asyncio.sleep(delta)
 
-        final_media_group = []
+        # Первое сообщение альбома добавляет свои медиа для каждого канала, поэтому убираем повторы один раз
+        medias = list({str(media.media): media for media in medias}.values())
+        message_ids = sorted(set(media_group_data.get('message_ids', [])))
+        templates = await get_templates(context.bot, channels)
 
-        for media in medias:
-            if str(media.media) not in [str(media.media) for media in final_media_group]:
-                final_media_group.append(media)
+        status = await message.reply_text(f'Отправляю медиа [0/{len(channels)}]')
+        progress = ProgressReporter(status.edit_text, 'Отправляю медиа', len(channels))
 
-        sent_messages = await context.bot.send_media_group(
-            chat_id=channel_id,
-            media=final_media_group,
-        )
+        for idx, channel_id in enumerate(channels, start=1):
+            await progress.update(idx - 1)
+
+            channel = templates.get(channel_id)
 
-        channel = await context.bot.get_chat(channel_id)
-        invite_link = channel.invite_link or ''
-        link = f'https://t.me/{invite_link.split('/')[-1]}'
-        footer = f'\n\nПодписывайтесь на канал - [{channel.title}]({link})'
+            if not channel:
+                logger.error(f'Channel {channel_id} not found')
+                continue
+
+            try:
+                message_link, album_message_ids = await send_album(
+                    context.bot,
+                    channel_id,
+                    medias,
+                    channel.render(forward_header + caption),
+                    message.chat_id,
+                    message_ids,
+                )
+            except TelegramError as e:
+                logger.error(f'Failed to send media to channel {channel_id}: {e}')
+                await message.reply_text(f'Не удалось отправить медиа в канал {channel.channel_name}.')
+                continue
 
-        msg = await sent_messages[0].edit_caption(caption + footer, parse_mode=ParseMode.MARKDOWN)
-        sent[channel_id] = {
-            'channel_name': channel.full_name,
-            'channel_link': channel.link,
-            'message_link': msg.link,
-        }
+            sent[channel_id] = {
+                'channel_name': channel.channel_name,
+                'channel_link': channel.channel_link,
+                'message_link': message_link,
+                'message_ids': album_message_ids,
+            }
+    except asyncio.CancelledError:
+        # Бот останавливается: сохраняем то, что успело уйти, и сообщаем пользователю
+        media_group_ids.pop(media_group_id, None)
+
+        if status is None:
+            # Остановка пришлась на сбор альбома или ожидание отложенного времени
+            await message.reply_text('Бот перезапускается, альбом не отправлен. Повторите отправку.')
+            raise
+
+        save_broadcast(user.id, message.message_id, caption, sent, forward_header)
+        await status.delete()
+        await message.reply_text(
+            f'Бот перезапускается, медиа отправлено в {len(sent)} из {len(channels)} каналов.'
+        )
+        raise
 
-    del media_group_ids[media_group_id]
+    # Запись могла уже удалить очистка user_data, если доставка ждала отложенного времени
+    media_group_ids.pop(media_group_id, None)
+    await status.delete()
 
     await message.reply_text('Медиа успешно отправлено.')
     text = ''
 
-    for k, v in sent.items():
+    for v in sent.values():
         text += f'{v["channel_name"]} - {v["message_link"]}\n'
-        save_post(k, v['channel_name'], message.message_id, caption, user.id)
+
+    save_broadcast(user.id, message.message_id, caption, sent, forward_header)
 
     file_like_object = BytesIO(text.encode('utf-8'))
     file_like_object.name = 'posts.txt'
     await message.reply_document(document=file_like_object)
 
 
+async def spawn_album_delivery(
+    context: ContextTypes.DEFAULT_TYPE,
+    message: Message,
+    user_data: dict,
+    user: User,
+    will_send_at: datetime | None = None,
+):
+    media_group_id = message.media_group_id
+
+    if not media_group_id:
+        raise Exception('Message is not a part of a media group')
+
+    task = task_supervisor.spawn(
+        check_for_media(context, message, user_data, media_group_id, user, will_send_at),
+        name=f'album-{user.id}-{media_group_id}',
+    )
+
+    if not task:
+        user_data.get('media_group_ids', {}).pop(media_group_id, None)
+        await message.reply_text('Бот перезапускается, повторите отправку через минуту.')
+
+
+@track_in_progress(BROADCASTS_IN_FLIGHT)
 async def send_messages_to_channels(
     update: Update,
     selected_channels: list[int],
@@ -149,26 +278,70 @@ async def send_messages_to_channels(
         user_data['group_is_sending'] = False
         return await message.reply_text('Вы не выбрали каналы для отправки.')
 
+    # Каналы, из которых бота удалили или лишили прав, пропускаем без попытки отправки
+    unreachable = get_unreachable_channels(selected_channels)
+
+    if unreachable:
+        selected_channels = [channel_id for channel_id in selected_channels if channel_id not in unreachable]
+
+        # Для альбома сообщаем один раз, на первом сообщении группы
+        if message.media_group_id not in user_data.get('media_group_ids', {}):
+            names = ', '.join(name for name, _ in unreachable.values())
+            await message.reply_text(f'Пропущены каналы, недоступные боту: {names}')
+
+        if not selected_channels:
+            user_data['is_sending'] = False
+            user_data['group_is_sending'] = False
+            return await message.reply_text('Все выбранные каналы недоступны боту.')
+
     if will_send_at:
         user_data['will_send_at'] = will_send_at
 
     logger.info(f'User {user.id} is sending a message to {len(selected_channels)} channels.')
     is_group_media = False
     sent = {}
+    # Строка «Переслано из канала», сохраняется с рассылкой для /edit_post
+    header = ''
 
-    for channel_id in selected_channels:
-        channel = get_channel(channel_id)
+    # Альбом копится по сообщениям и отправляется в check_for_media, там свой прогресс
+    status = None
+    progress = None
 
-        if not channel:
-            raise Exception('Channel not found')
+    if not message.media_group_id:
+        status = await message.reply_text(f'Отправляю сообщение [0/{len(selected_channels)}]')
+        progress = ProgressReporter(status.edit_text, 'Отправляю сообщение', len(selected_channels))
 
-        chat_link = (
-            channel.channel_link or (await context.bot.get_chat(channel.id)).invite_link or ''
-        )
-        link = f'https://t.me/{chat_link.split('/')[-1]}'
+    channels_to_send = selected_channels
+
+    # Обычный текст можно разослать параллельно дополнительными ботами пула
+    if (
+        bot_pool.bots
+        and message.text
+        and not isinstance(message.forward_origin, MessageOriginChannel)
+    ):
+        sent, failed = await bot_pool.send_text(context.bot, message, selected_channels, progress)
+        channels_to_send = []
+
+        if status:
+            await status.delete()
+            status = None
+
+        if failed:
+            await message.reply_text(f'Не удалось отправить сообщение в {len(failed)} каналов.')
+
+    templates = await get_templates(context.bot, channels_to_send)
+
+    for idx, channel_id in enumerate(channels_to_send, start=1):
+        if progress:
+            await progress.update(idx - 1)
+
+        channel = templates.get(channel_id)
+
+        if not channel:
+            if status:
+                await status.delete()
 
-        header = f'📣 Переслано из канала - [{channel.channel_name}]({link})\n\n'
-        footer = f'\n\nПодписывайтесь на канал - [{channel.channel_name}]({link})'
+            raise Exception('Channel not found')
 
         try:
             if isinstance(message.forward_origin, MessageOriginChannel):
@@ -194,11 +367,7 @@ async def send_messages_to_channels(
                         if message.voice:
                             media_group.append(InputMediaAudio(media=message.voice.file_id))
 
-                        chat_link = (
-                            chat.link or (await context.bot.get_chat(chat.id)).invite_link or ''
-                        )
-                        link = f'https://t.me/{chat_link.split('/')[-1]}'
-                        header = f'📣 Переслано из канала - [{chat.title}]({link})\n\n'
+                        header = await get_forward_header(context.bot, chat)
                         caption = message.caption or ''
 
                         media_group_ids = user_data.get(
@@ -207,7 +376,9 @@ async def send_messages_to_channels(
                                 message.media_group_id: {
                                     'channels': [],
                                     'media': [],
-                                    'caption': header + caption,
+                                    'caption': caption,
+                                    'forward_header': header,
+                                    'message_ids': [message.message_id],
                                     'last_time_sended': time(),
                                 }
                             },
@@ -218,7 +389,9 @@ async def send_messages_to_channels(
                             {
                                 'channels': [],
                                 'media': [],
-                                'caption': header + caption,
+                                'caption': caption,
+                                'forward_header': header,
+                                'message_ids': [message.message_id],
                                 'last_time_sended': time(),
                             },
                         )
@@ -231,21 +404,20 @@ async def send_messages_to_channels(
                         user_data['media_group_ids'] = media_group_ids
 
                         if len(media_group_data['channels']) == 1:
-                            asyncio.create_task(
-                                check_for_media(
-                                    context, user_data, message.media_group_id, will_send_at, user
-                                )
+                            await spawn_album_delivery(
+                                context, message, user_data, user, will_send_at
                             )
 
                         continue
 
                     else:
                         msg = await message.forward(channel_id)
-                        logger.info(f'Message is forwarded to channel {channel_id}')
+                        logger.info(f'Message is forwarded to channel {channel_id}', extra=SAMPLED)
                         sent[channel_id] = {
                             'channel_name': channel.channel_name,
                             'channel_link': channel.channel_link,
                             'message_link': msg.link,
+                            'message_ids': [msg.message_id],
                             'message_text': message.caption or message.text,
                         }
                         continue
@@ -253,7 +425,7 @@ async def send_messages_to_channels(
                 except TelegramError:
                     pass
 
-                header = f'📣 Переслано из канала - [{chat.title}]({chat.link})\n\n'
+                header = await get_forward_header(context.bot, chat)
             else:
                 header = ''
 
@@ -262,23 +434,24 @@ async def send_messages_to_channels(
                     await message.copy(chat_id=channel_id, parse_mode=ParseMode.MARKDOWN)
                 ).message_id
 
-                logger.info(f'Message with text is sending to channel {channel_id}')
+                logger.info(f'Message with text is sending to channel {channel_id}', extra=SAMPLED)
                 msg = await context.bot.edit_message_text(
                     chat_id=channel_id,
                     message_id=sent_message_id,
-                    text=header + message.text + footer,
+                    text=channel.render(header + message.text),
                     parse_mode=ParseMode.MARKDOWN,
                 )
                 sent[channel_id] = {
                     'channel_name': channel.channel_name,
                     'channel_link': channel.channel_link,
                     'message_link': msg.link,
+                    'message_ids': [msg.message_id],
                 }
                 continue
 
             elif message.media_group_id:
                 is_group_media = True
-                logger.info(f'Message with media will be sended to channel {channel_id}')
+                logger.info(f'Message with media will be sended to channel {channel_id}', extra=SAMPLED)
 
                 media_group = []
 
@@ -305,7 +478,9 @@ async def send_messages_to_channels(
                         message.media_group_id: {
                             'channels': [],
                             'media': [],
-                            'caption': header + caption,
+                            'caption': caption,
+                            'forward_header': header,
+                            'message_ids': [message.message_id],
                             'last_time_sended': time(),
                         }
                     },
@@ -316,7 +491,9 @@ async def send_messages_to_channels(
                     {
                         'channels': [],
                         'media': [],
-                        'caption': header + caption,
+                        'caption': caption,
+                        'forward_header': header,
+                        'message_ids': [message.message_id],
                         'last_time_sended': time(),
                     },
                 )
@@ -329,11 +506,7 @@ async def send_messages_to_channels(
                 user_data['media_group_ids'] = media_group_ids
 
                 if len(media_group_data['channels']) == 1:
-                    asyncio.create_task(
-                        check_for_media(
-                            context, user_data, message.media_group_id, will_send_at, user
-                        )
-                    )
+                    await spawn_album_delivery(context, message, user_data, user, will_send_at)
 
                 continue
 
@@ -344,17 +517,18 @@ async def send_messages_to_channels(
 
                 caption = message.caption or ''
 
-                logger.info(f'Message with photo is sending to channel {channel_id}')
+                logger.info(f'Message with photo is sending to channel {channel_id}', extra=SAMPLED)
                 msg = await context.bot.edit_message_caption(
                     chat_id=channel_id,
                     message_id=sent_message_id,
-                    caption=header + caption + footer,
+                    caption=channel.render(header + caption),
                     parse_mode=ParseMode.MARKDOWN,
                 )
                 sent[channel_id] = {
                     'channel_name': channel.channel_name,
                     'channel_link': channel.channel_link,
                     'message_link': msg.link,
+                    'message_ids': [msg.message_id],
                     'message_text': caption,
                 }
 
@@ -365,17 +539,18 @@ async def send_messages_to_channels(
 
                 caption = message.caption or ''
 
-                logger.info(f'Message with video is sending to channel {channel_id}')
+                logger.info(f'Message with video is sending to channel {channel_id}', extra=SAMPLED)
                 msg = await context.bot.edit_message_caption(
                     chat_id=channel_id,
                     message_id=sent_message_id,
-                    caption=header + caption + footer,
+                    caption=channel.render(header + caption),
                     parse_mode=ParseMode.MARKDOWN,
                 )
                 sent[channel_id] = {
                     'channel_name': channel.channel_name,
                     'channel_link': channel.channel_link,
                     'message_link': msg.link,
+                    'message_ids': [msg.message_id],
                     'message_text': caption,
                 }
 
@@ -385,23 +560,28 @@ async def send_messages_to_channels(
                         await message.copy(chat_id=channel_id, parse_mode=ParseMode.MARKDOWN)
                     ).message_id
 
-                    logger.info(f'Message with caption is sending to channel {channel_id}')
+                    logger.info(f'Message with caption is sending to channel {channel_id}', extra=SAMPLED)
                     msg = await context.bot.edit_message_caption(
                         chat_id=channel_id,
                         message_id=sent_message_id,
-                        caption=header + message.caption + footer,
+                        caption=channel.render(header + message.caption),
                         parse_mode=ParseMode.MARKDOWN,
                     )
                     sent[channel_id] = {
                         'channel_name': channel.channel_name,
                         'channel_link': channel.channel_link,
                         'message_link': msg.link,
+                        'message_ids': [msg.message_id],
                         'message_text': caption,
                     }
                     continue
 
         except Exception as e:
             logger.error(f'Failed to send message to channel {channel_id}: {e}')
+
+            if isinstance(e, Forbidden):
+                set_channels_health([(channel_id, 'kicked', False)])
+
             await message.reply_text(
                 f'Не удалось отправить сообщение в канал {channel.channel_name}.'
             )
@@ -409,6 +589,9 @@ async def send_messages_to_channels(
     user_data['is_sending'] = False
     user_data['group_is_sending'] = False
 
+    if status:
+        await status.delete()
+
     logger.info(f'Message is sent to {len(selected_channels)} channels')
     await message.reply_text('Сообщение успешно отправлено в выбранные каналы.')
 
@@ -418,11 +601,12 @@ async def send_messages_to_channels(
     if not is_group_media:
         text = ''
 
-        for k, v in sent.items():
+        for v in sent.values():
             text += f'{v["channel_name"]} - {v["message_link"]}\n'
-            save_post(
-                k, v['channel_name'], message.message_id, message.caption or message.text, user.id
-            )
+
+        save_broadcast(
+            user.id, message.message_id, message.caption or message.text, sent, header
+        )
 
         file_like_object = BytesIO(text.encode('utf-8'))
         file_like_object.name = 'posts.txt'
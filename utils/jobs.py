@@ -0,0 +1,64 @@
+import asyncio
+from logging import getLogger
+
+from telegram.ext import Application, ContextTypes
+
+from config.environment import settings
+from database.partitions import archive_posts_partitions, ensure_posts_partitions
+from utils.bot_pool import bot_pool
+from utils.channel_health import check_channels_health
+from utils.user_data import sweep_user_data
+
+logger = getLogger(__name__)
+
+
+async def posts_partitions_job(context: ContextTypes.DEFAULT_TYPE):
+    await asyncio.to_thread(ensure_posts_partitions)
+    archived = await asyncio.to_thread(archive_posts_partitions)
+
+    if archived:
+        logger.info(f'Archived {len(archived)} posts partitions')
+
+
+async def channels_health_job(context: ContextTypes.DEFAULT_TYPE):
+    unreachable = await check_channels_health(context.bot, bot_pool.bots)
+    logger.info(f'Channel health check finished, {unreachable} channels are unreachable')
+
+
+async def user_data_sweep_job(context: ContextTypes.DEFAULT_TYPE):
+    stats = sweep_user_data(context.application)
+
+    if any(stats.values()):
+        logger.info(
+            f'Swept user_data: {stats["users"]} idle users, {stats["keys"]} keys, '
+            f'{stats["media_groups"]} media groups'
+        )
+
+
+def register_jobs(app: Application):
+    job_queue = app.job_queue
+
+    if not job_queue:
+        raise Exception('Job queue is not available')
+
+    job_queue.run_repeating(
+        posts_partitions_job,
+        interval=settings.POSTS_MAINTENANCE_INTERVAL,
+        first=0,
+        name='posts_partitions',
+    )
+
+    if settings.CHANNEL_HEALTH_INTERVAL > 0:
+        job_queue.run_repeating(
+            channels_health_job,
+            interval=settings.CHANNEL_HEALTH_INTERVAL,
+            first=60,
+            name='channels_health',
+        )
+
+    job_queue.run_repeating(
+        user_data_sweep_job,
+        interval=settings.USER_DATA_SWEEP_INTERVAL,
+        first=settings.USER_DATA_SWEEP_INTERVAL,
+        name='user_data_sweep',
+    )
@@ -0,0 +1,83 @@
+from collections.abc import Awaitable, Callable
+from logging import getLogger
+from time import monotonic
+
+from telegram.error import BadRequest, TelegramError
+
+from config.environment import settings
+
+logger = getLogger(__name__)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+
+    if seconds < 60:
+        return f'{seconds} с'
+
+    if seconds < 60 * 60:
+        return f'{seconds // 60} мин {seconds % 60} с'
+
+    return f'{seconds // 3600} ч {seconds % 3600 // 60} мин'
+
+
+class ProgressReporter:
+    """Сообщение о ходе долгой операции, которое редактируется не чаще раза в `interval` секунд.
+
+    ```python
+    progress = ProgressReporter(msg.edit_text, 'Скачиваю посты', len(channels))
+    for idx, channel_id in enumerate(channels, start=1):
+        ...
+        await progress.update(idx)
+    ```
+    """
+
+    def __init__(
+        self,
+        edit: Callable[[str], Awaitable],
+        title: str,
+        total: int,
+        interval: float | None = None,
+    ):
+        self.edit = edit
+        self.title = title
+        self.total = total
+        self.interval = settings.PROGRESS_UPDATE_INTERVAL if interval is None else interval
+        self.started_at = monotonic()
+        self.updated_at = 0.0
+        # Сообщение создаётся с текстом render(0), повторно его не отправляем
+        self.text = self.render(0)
+
+    def render(self, done: int) -> str:
+        text = f'{self.title} [{done}/{self.total}]'
+        elapsed = monotonic() - self.started_at
+
+        # Оценка по средней скорости с начала операции
+        if 0 < done < self.total and elapsed > 0:
+            remaining = (self.total - done) * elapsed / done
+            text += f'\nОсталось примерно {format_duration(remaining)}'
+
+        return text
+
+    async def update(self, done: int, force: bool = False):
+        now = monotonic()
+
+        if not force and done < self.total and now - self.updated_at < self.interval:
+            return
+
+        text = self.render(done)
+
+        if text == self.text:
+            return
+
+        self.updated_at = now
+        self.text = text
+
+        try:
+            await self.edit(text)
+        except BadRequest as e:
+            if 'not modified' not in e.message:
+                logger.error(f'Failed to update progress: {e}')
+        except TelegramError as e:
+            # Прогресс не должен ломать саму операцию
+            logger.error(f'Failed to update progress: {e}')
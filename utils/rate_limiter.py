@@ -0,0 +1,106 @@
+import asyncio
+from time import perf_counter
+from typing import Any, Literal
+
+from aiolimiter import AsyncLimiter
+from telegram.ext import AIORateLimiter
+
+from config.environment import settings
+from config.metrics import RATE_LIMIT_QUEUED, RATE_LIMIT_WAIT
+
+Lane = Literal['interactive', 'broadcast', 'background']
+
+
+class PriorityRateLimiter(AIORateLimiter):
+    """AIORateLimiter с полосами: ответы пользователям, рассылки и фоновые задачи.
+
+    Рассылки и фоновые задачи вместе ограничены общим лимитом за вычетом
+    `RATE_LIMIT_INTERACTIVE_RESERVED`, фоновые задачи ещё и своим `RATE_LIMIT_BACKGROUND`.
+    Общий лимит ответы пользователям получают первыми: остальные полосы встают в его очередь
+    по одному и только когда ответов не ждёт. Полосу можно указать явно:
+    `rate_limit_args={'lane': 'background'}`.
+    """
+
+    def __init__(self):
+        # Общий лимит считаем сами, чтобы у ответов пользователям был приоритет
+        super().__init__(overall_max_rate=0, max_retries=settings.RATE_LIMIT_MAX_RETRIES)
+        self._overall_limiter = AsyncLimiter(settings.RATE_LIMIT_OVERALL, 1)
+        self._non_interactive_limiter = AsyncLimiter(
+            max(settings.RATE_LIMIT_OVERALL - settings.RATE_LIMIT_INTERACTIVE_RESERVED, 1), 1
+        )
+        self._background_limiter = AsyncLimiter(settings.RATE_LIMIT_BACKGROUND, 1)
+        self._non_interactive_lock = asyncio.Lock()
+        self._interactive_waiting = 0
+        self._interactive_idle = asyncio.Event()
+        self._interactive_idle.set()
+
+    async def acquire_lane(self, lane: Lane):
+        if lane == 'interactive':
+            self._interactive_waiting += 1
+            self._interactive_idle.clear()
+
+            try:
+                await self._overall_limiter.acquire()
+            finally:
+                self._interactive_waiting -= 1
+
+                if not self._interactive_waiting:
+                    self._interactive_idle.set()
+
+            return
+
+        if lane == 'background':
+            await self._background_limiter.acquire()
+
+        await self._non_interactive_limiter.acquire()
+
+        # В очереди общего лимита не больше одного запроса рассылки, ответы его обгоняют
+        async with self._non_interactive_lock:
+            await self._interactive_idle.wait()
+            await self._overall_limiter.acquire()
+
+    @staticmethod
+    def get_lane(data: dict[str, Any], rate_limit_args: Any) -> Lane:
+        if isinstance(rate_limit_args, dict) and rate_limit_args.get('lane'):
+            return rate_limit_args['lane']
+
+        chat_id = data.get('chat_id')
+
+        # Каналы и группы (отрицательный id или @username) — это рассылка, личные чаты — интерфейс
+        if isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0):
+            return 'broadcast'
+
+        return 'interactive'
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        lane = self.get_lane(data, rate_limit_args)
+        max_retries = (
+            rate_limit_args.get('max_retries') if isinstance(rate_limit_args, dict) else rate_limit_args
+        )
+        queued_at = perf_counter()
+        started = False
+
+        async def timed_callback(*callback_args, **callback_kwargs):
+            nonlocal started
+
+            # При повторе после RetryAfter ожидание уже учтено
+            if not started:
+                started = True
+                RATE_LIMIT_QUEUED.labels(lane).dec()
+                RATE_LIMIT_WAIT.labels(lane).observe(perf_counter() - queued_at)
+
+            return await callback(*callback_args, **callback_kwargs)
+
+        RATE_LIMIT_QUEUED.labels(lane).inc()
+
+        try:
+            # Как и в AIORateLimiter, общий лимит касается только запросов в чаты
+            if data.get('chat_id') is not None:
+                await self.acquire_lane(lane)
+
+            return await super().process_request(
+                timed_callback, args, kwargs, endpoint, data, max_retries
+            )
+        finally:
+            if not started:
+                RATE_LIMIT_QUEUED.labels(lane).dec()
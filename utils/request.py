@@ -0,0 +1,53 @@
+from time import perf_counter
+
+import httpx
+from telegram.error import NetworkError, TimedOut
+from telegram.request import HTTPXRequest
+
+from config.environment import settings
+from config.metrics import BOT_API_LATENCY, BOT_API_RESPONSES
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, который пишет латентность и коды ответов Bot API в метрики."""
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        endpoint = url.rsplit('/', 1)[-1]
+        code = 'error'
+        started = perf_counter()
+
+        try:
+            code, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+        except TimedOut:
+            code = 'timeout'
+            raise
+        except NetworkError:
+            code = 'network'
+            raise
+        finally:
+            BOT_API_LATENCY.labels(endpoint).observe(perf_counter() - started)
+            BOT_API_RESPONSES.labels(endpoint, str(code)).inc()
+
+        return code, payload
+
+
+def build_request(connection_pool_size: int | None = None) -> InstrumentedRequest:
+    """HTTP-клиент Bot API с пулом соединений, таймаутами и версией HTTP из настроек."""
+    pool_size = connection_pool_size or settings.HTTP_POOL_SIZE
+
+    return InstrumentedRequest(
+        connection_pool_size=pool_size,
+        read_timeout=settings.HTTP_READ_TIMEOUT,
+        write_timeout=settings.HTTP_WRITE_TIMEOUT,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        pool_timeout=settings.HTTP_POOL_TIMEOUT,
+        media_write_timeout=settings.HTTP_MEDIA_WRITE_TIMEOUT,
+        http_version=settings.HTTP_VERSION,
+        httpx_kwargs={
+            'limits': httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        },
+    )
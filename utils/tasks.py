@@ -0,0 +1,104 @@
+import asyncio
+from collections.abc import Coroutine, Iterator
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Any
+
+from config.environment import settings
+from config.metrics import BACKGROUND_TASKS
+
+logger = getLogger(__name__)
+
+
+class TaskSupervisor:
+    """Фоновые задачи бота (например, сборка и отправка альбомов).
+
+    Хранит ссылки на задачи, чтобы их не собрал сборщик мусора, ограничивает число одновременно
+    работающих, логирует их исключения и при остановке бота дожидается их завершения.
+    """
+
+    def __init__(self, limit: int):
+        self.tasks: set[asyncio.Task] = set()
+        # Задачи, которые сейчас просто ждут (например, отложенного времени отправки)
+        self.waiting_tasks: set[asyncio.Task] = set()
+        self.closed = False
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def spawn(self, coroutine: Coroutine[Any, Any, Any], name: str) -> asyncio.Task | None:
+        """Запустить задачу. Возвращает None, если бот уже останавливается."""
+        if self.closed:
+            coroutine.close()
+            logger.warning(f'Task {name} is rejected, the bot is shutting down')
+            return None
+
+        task = asyncio.create_task(self._run(coroutine), name=name)
+        self.tasks.add(task)
+        BACKGROUND_TASKS.inc()
+        task.add_done_callback(self._done)
+
+        return task
+
+    @contextmanager
+    def waiting(self) -> Iterator[None]:
+        """Отметить ожидание текущей задачи: при остановке бота её отменяют сразу, а не ждут."""
+        task = asyncio.current_task()
+
+        if not task:
+            raise Exception('Task can not be fetched')
+
+        if self.closed:
+            task.cancel()
+
+        self.waiting_tasks.add(task)
+
+        try:
+            yield
+        finally:
+            self.waiting_tasks.discard(task)
+
+    async def _run(self, coroutine: Coroutine[Any, Any, Any]):
+        async with self._semaphore:
+            return await coroutine
+
+    def _done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        BACKGROUND_TASKS.dec()
+
+        if task.cancelled():
+            logger.warning(f'Task {task.get_name()} is cancelled')
+            return
+
+        exception = task.exception()
+
+        if exception:
+            logger.error(f'Task {task.get_name()} failed', exc_info=exception)
+
+    async def drain(self, timeout: float | None = None):
+        """Перестать принимать задачи и дождаться текущих, по истечении `timeout` отменить их."""
+        if timeout is None:
+            timeout = settings.TASKS_SHUTDOWN_TIMEOUT
+
+        self.closed = True
+
+        if not self.tasks:
+            return
+
+        # Ждущие задачи до отправки не дойдут, отменяем их сразу
+        for task in self.waiting_tasks:
+            task.cancel()
+
+        logger.info(f'Waiting for {len(self.tasks)} background tasks to finish')
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+
+        if not pending:
+            return
+
+        for task in pending:
+            task.cancel()
+
+        # Даём отменённым задачам сообщить пользователю, что успело отправиться
+        await asyncio.wait(pending, timeout=5)
+        logger.error(f'{len(pending)} background tasks did not finish in {timeout}s')
+
+
+task_supervisor = TaskSupervisor(settings.TASKS_LIMIT)
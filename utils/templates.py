@@ -0,0 +1,107 @@
+from logging import getLogger
+from string import Formatter
+from typing import NamedTuple
+
+from telegram import Bot, Chat
+from telegram.error import TelegramError
+from telegram.helpers import escape_markdown
+
+from config.environment import settings
+from database import channel_templates_cache, get_channel_templates
+
+logger = getLogger(__name__)
+
+
+class ChannelTemplate(NamedTuple):
+    channel_name: str
+    channel_link: str
+    header: str
+    footer: str
+
+    def render(self, text: str) -> str:
+        return self.header + text + self.footer
+
+
+def format_template(template: str, name: str, link: str) -> str:
+    """Подставить название и ссылку канала. Markdown в названии экранируется."""
+    return template.format(name=escape_markdown(name), link=link)
+
+
+def validate_template(template: str) -> bool:
+    """Разрешены только `{name}` и `{link}` без атрибутов, индексов, `!r` и формата."""
+    try:
+        fields = [
+            (field, spec, conversion)
+            for _, field, spec, conversion in Formatter().parse(template)
+            if field is not None
+        ]
+    except ValueError:
+        return False
+
+    return all(
+        field in ('name', 'link') and not spec and conversion is None
+        for field, spec, conversion in fields
+    )
+
+
+async def get_public_link(bot: Bot, chat_id: int, link: str | None) -> str:
+    if not link:
+        try:
+            link = (await bot.get_chat(chat_id)).invite_link
+        except TelegramError as e:
+            logger.error(f'Failed to fetch invite link of chat {chat_id}: {e}')
+
+    return f'https://t.me/{(link or '').split('/')[-1]}'
+
+
+async def get_templates(bot: Bot, channel_ids: list[int]) -> dict[int, ChannelTemplate]:
+    """Готовые шапка и подпись для каждого канала; собираются один раз и кэшируются."""
+    templates: dict[int, ChannelTemplate] = {}
+    missing = []
+
+    for channel_id in channel_ids:
+        template = channel_templates_cache.get(channel_id)
+
+        if template is None:
+            missing.append(channel_id)
+        else:
+            templates[channel_id] = template
+
+    if not missing:
+        return templates
+
+    for channel_id, row in get_channel_templates(missing).items():
+        link = await get_public_link(bot, channel_id, row.channel_link)
+        header = row.header_template
+        footer = row.footer_template
+
+        if header is None:
+            header = settings.POST_HEADER_TEMPLATE
+
+        if footer is None:
+            footer = settings.POST_FOOTER_TEMPLATE
+
+        template = ChannelTemplate(
+            channel_name=row.channel_name,
+            channel_link=row.channel_link,
+            header=format_template(header, row.channel_name, link) + '\n\n' if header else '',
+            footer='\n\n' + format_template(footer, row.channel_name, link) if footer else '',
+        )
+        channel_templates_cache.set(channel_id, template)
+        templates[channel_id] = template
+
+    return templates
+
+
+async def get_forward_header(bot: Bot, chat: Chat) -> str:
+    """Строка «Переслано из канала» для поста, пересланного из другого канала."""
+    key = ('forward', chat.id)
+    header = channel_templates_cache.get(key)
+
+    if header is None:
+        link = await get_public_link(bot, chat.id, chat.link)
+        template = settings.POST_FORWARD_TEMPLATE
+        header = format_template(template, chat.title or '', link) + '\n\n' if template else ''
+        channel_templates_cache.set(key, header)
+
+    return header
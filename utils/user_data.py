@@ -0,0 +1,86 @@
+from fnmatch import fnmatch
+from logging import getLogger
+from time import time
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from config.environment import settings
+from config.metrics import USER_DATA_ENTRIES
+
+logger = getLogger(__name__)
+
+LAST_ACTIVE_KEY = 'last_active_at'
+
+
+async def touch_user_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Запомнить время последнего действия пользователя, от него считаются TTL ключей."""
+    if update.effective_user and isinstance(context.user_data, dict):
+        context.user_data[LAST_ACTIVE_KEY] = time()
+
+
+def get_key_ttl(key: str) -> float | None:
+    for pattern, ttl in settings.USER_DATA_TTLS.items():
+        if fnmatch(key, pattern):
+            return ttl
+
+    return None
+
+
+def sweep_media_groups(user_data: dict, now: float) -> int:
+    """Удалить альбомы, сообщения которых перестали приходить больше USER_DATA_MEDIA_GROUP_TTL назад."""
+    media_group_ids = user_data.get('media_group_ids')
+
+    if not media_group_ids:
+        user_data.pop('media_group_ids', None)
+        return 0
+
+    expired = [
+        media_group_id
+        for media_group_id, data in media_group_ids.items()
+        if data.get('last_time_sended', 0) + settings.USER_DATA_MEDIA_GROUP_TTL < now
+    ]
+
+    for media_group_id in expired:
+        del media_group_ids[media_group_id]
+
+    return len(expired)
+
+
+def sweep_user_data(app: Application, now: float | None = None) -> dict[str, int]:
+    """Очистить user_data всех пользователей по TTL и обновить метрики его размера."""
+    if now is None:
+        now = time()
+
+    stats = {'users': 0, 'keys': 0, 'media_groups': 0}
+
+    for user_id, user_data in list(app.user_data.items()):
+        last_active = user_data.get(LAST_ACTIVE_KEY, 0)
+        idle = now - last_active
+
+        if last_active and idle > settings.USER_DATA_IDLE_TTL:
+            app.drop_user_data(user_id)
+            stats['users'] += 1
+            continue
+
+        stats['media_groups'] += sweep_media_groups(user_data, now)
+
+        # Без отметки активности (данные старше этой очистки) ключи не трогаем до следующего действия
+        if not last_active:
+            continue
+
+        for key in list(user_data):
+            ttl = get_key_ttl(key)
+
+            if ttl is not None and idle > ttl:
+                del user_data[key]
+                stats['keys'] += 1
+
+    users = list(app.user_data.values())
+    USER_DATA_ENTRIES.labels('users').set(len(users))
+    USER_DATA_ENTRIES.labels('keys').set(sum(len(user_data) for user_data in users))
+    USER_DATA_ENTRIES.labels('media_groups').set(
+        sum(len(user_data.get('media_group_ids', {})) for user_data in users)
+    )
+
+    return stats